@@ -0,0 +1,151 @@
+import json
+import re
+import click
+from flask import current_app
+from sqlalchemy import event
+from models import db, Venue, Artist
+
+
+def route_requests(app):
+    """(label, method, path, form) for every read route in the url map.
+
+    Detail routes are filled in with the first venue/artist id (and the
+    first venue's area); of the
+    POST routes only the searches are exercised, since the rest write.
+    """
+    venue = db.session.query(Venue.id, Venue.state, Venue.city).order_by(Venue.id).first()
+    sample_ids = {
+        'venue_id': venue and venue.id,
+        'artist_id': db.session.query(Artist.id).order_by(Artist.id).limit(1).scalar(),
+        'state': venue and venue.state,
+        'city': venue and venue.city,
+    }
+
+    requests = []
+    with app.test_request_context():
+        for rule in app.url_map.iter_rules():
+            if rule.endpoint == 'static':
+                continue
+            args = {name: sample_ids.get(name) for name in rule.arguments}
+            if None in args.values():
+                continue
+            path = rule.build(args, append_unknown=False)[1]
+            if 'GET' in rule.methods:
+                requests.append((f'GET {rule.rule}', 'GET', path, None))
+            elif 'POST' in rule.methods and rule.endpoint.startswith('main.search_'):
+                requests.append((f'POST {rule.rule}', 'POST', path, {'search_term': 'a'}))
+    return requests
+
+
+def capture_queries(app, requests):
+    """Run each request through the test client and collect its SELECTs."""
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        client = app.test_client()
+        for label, method, path, form in requests:
+            start = len(captured)
+            client.open(path, method=method, data=form)
+            yield label, captured[start:]
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _postgres_seq_scans(cursor, statement, parameters):
+    # With sequential scans priced out, any Seq Scan left in the plan is a
+    # table the query has no usable index for.
+    cursor.execute('SET LOCAL enable_seqscan = off')
+    cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans = []
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node.get('Node Type') == 'Seq Scan':
+            scans.append(node.get('Relation Name'))
+        nodes.extend(node.get('Plans', []))
+    return scans
+
+
+def _ordered_by_id(statement, table):
+    """Whether ``statement``'s first sort key is ``table``'s id (its rowid)."""
+    return re.search(
+        rf'\bORDER BY\s+"?{re.escape(table)}"?\."?id"?(\s+(ASC|DESC))?\s*(,|\bLIMIT\b|\bOFFSET\b|$)',
+        statement, re.IGNORECASE,
+    ) is not None
+
+
+def _sqlite_seq_scans(cursor, statement, parameters):
+    cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+    details = [row[-1] for row in cursor.fetchall()]
+    sorts = any(detail.startswith('USE TEMP B-TREE FOR ORDER BY') for detail in details)
+    filtered = re.search(r'\bWHERE\b', statement, re.IGNORECASE) is not None
+    scans = []
+    for detail in details:
+        # "SCAN venue" is a full table scan; "SCAN venue USING INDEX ..."
+        # walks an index and is fine for ordered listings. "SCAN CONSTANT
+        # ROW" is a SELECT without a FROM.
+        if not detail.startswith('SCAN ') or ' USING ' in detail or detail == 'SCAN CONSTANT ROW':
+            continue
+        table = detail.split()[1]
+        # Walking the whole, unfiltered table in rowid order to return it
+        # ORDER BY id is the primary key index scan Postgres would use.
+        if not sorts and not filtered and _ordered_by_id(statement, table):
+            continue
+        scans.append(table)
+    return scans
+
+
+EXPLAINERS = {
+    'postgresql': _postgres_seq_scans,
+    'sqlite': _sqlite_seq_scans,
+}
+
+
+def explain_seq_scans(statement, parameters):
+    explainer = EXPLAINERS.get(db.engine.dialect.name)
+    if explainer is None:
+        raise click.ClickException(f'EXPLAIN is not supported for {db.engine.dialect.name!r}')
+
+    connection = db.engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        try:
+            return explainer(cursor, statement, parameters)
+        finally:
+            cursor.close()
+            connection.rollback()
+    finally:
+        connection.close()
+
+
+@click.command('db-advise')
+@click.option('--verbose', is_flag=True, help='Print every statement, not just those with scans.')
+def db_advise_command(verbose):
+    """EXPLAIN every route's queries and report sequential scans."""
+    app = current_app._get_current_object()
+    findings = 0
+
+    for label, statements in capture_queries(app, route_requests(app)):
+        click.echo(f'{label}: {len(statements)} queries')
+        for statement, parameters in statements:
+            scans = explain_seq_scans(statement, parameters)
+            if scans:
+                findings += 1
+                click.secho(f"  seq scan on {', '.join(scans)}", fg='yellow')
+            if scans or verbose:
+                click.echo('    ' + ' '.join(statement.split()))
+
+    if findings:
+        click.secho(f'{findings} queries fall back to sequential scans', fg='yellow')
+    else:
+        click.secho('No sequential scans found', fg='green')
@@ -0,0 +1,262 @@
+import json
+import os
+from datetime import date, datetime
+from flask import Blueprint, Response, abort, current_app, jsonify, make_response, request, stream_with_context
+from sqlalchemy import and_, exists, select
+from models import db, Venue, Artist, Show, MAX_SHOW_MINUTES
+from scheduling import find_conflicts
+
+api = Blueprint('api', __name__, url_prefix='/api')
+
+RESOURCES = {
+    'shows': {
+        'fields': {
+            'id': Show.id,
+            'start_time': Show.start_time,
+            'duration_minutes': Show.duration_minutes,
+            'venue_id': Show.venue_id,
+            'venue_name': Venue.name,
+            'artist_id': Show.artist_id,
+            'artist_name': Artist.name,
+            'artist_image_link': Artist.image_link,
+        },
+        'order_by': (Show.start_time, Show.id),
+    },
+    'venues': {
+        'fields': {
+            'id': Venue.id,
+            'name': Venue.name,
+            'city': Venue.city,
+            'state': Venue.state,
+            'address': Venue.address,
+            'phone': Venue.phone,
+            'genres': Venue.genres,
+            'image_link': Venue.image_link,
+            'facebook_link': Venue.facebook_link,
+            'website_link': Venue.website_link,
+            'seeking_talent': Venue.seeking_talent,
+            'seeking_description': Venue.seeking_description,
+        },
+        'order_by': (Venue.id,),
+    },
+    'artists': {
+        'fields': {
+            'id': Artist.id,
+            'name': Artist.name,
+            'city': Artist.city,
+            'state': Artist.state,
+            'phone': Artist.phone,
+            'genres': Artist.genres,
+            'image_link': Artist.image_link,
+            'facebook_link': Artist.facebook_link,
+            'website': Artist.website,
+            'seeking_venue': Artist.seeking_venue,
+            'seeking_description': Artist.seeking_description,
+        },
+        'order_by': (Artist.id,),
+    },
+}
+
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+def bad_request(message):
+    abort(make_response(jsonify({'error': message}), 400))
+
+
+def parse_fields(resource):
+    available = RESOURCES[resource]['fields']
+    requested = request.args.get('fields')
+    if not requested:
+        return list(available)
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        bad_request(f"Unknown fields for {resource}: {', '.join(unknown)}")
+    return names
+
+
+def parse_date(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        bad_request(f'{name!r} must be an ISO 8601 date or datetime')
+
+
+def date_range(column, start, end):
+    """Half-open ``[start, end)`` condition on ``column``."""
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column < end)
+    return and_(*conditions)
+
+
+def build_query(resource, fields, start, end):
+    spec = RESOURCES[resource]
+    stmt = select(*[spec['fields'][name].label(name) for name in fields])
+
+    if resource == 'shows':
+        stmt = stmt.select_from(Show) \
+            .join(Venue, Show.venue_id == Venue.id) \
+            .join(Artist, Show.artist_id == Artist.id)
+        if start is not None or end is not None:
+            stmt = stmt.where(date_range(Show.start_time, start, end))
+    elif start is not None or end is not None:
+        # Venues and artists match when they have a show in the range.
+        model = Venue if resource == 'venues' else Artist
+        foreign_key = Show.venue_id if resource == 'venues' else Show.artist_id
+        stmt = stmt.select_from(model).where(
+            exists().where(foreign_key == model.id, date_range(Show.start_time, start, end))
+        )
+
+    return stmt.order_by(*spec['order_by'])
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def stream_rows(stmt, output):
+    """Yield the encoded rows of ``stmt`` from a server-side cursor.
+
+    Rows are fetched ``API_BATCH_SIZE`` at a time and written out one by
+    one, so memory use stays flat however many rows match.
+    """
+    result = db.session.execute(
+        stmt.execution_options(yield_per=current_app.config['API_BATCH_SIZE'])
+    )
+    dumps = json.JSONEncoder(default=_default, separators=(',', ':')).encode
+
+    if output == 'ndjson':
+        for row in result.mappings():
+            yield dumps(dict(row)) + '\n'
+        return
+
+    yield '['
+    separator = ''
+    for row in result.mappings():
+        yield separator + dumps(dict(row))
+        separator = ','
+    yield ']\n'
+
+
+def stream_resource(resource):
+    output = request.args.get('format', 'ndjson')
+    if output not in FORMATS:
+        bad_request(f"'format' must be one of {', '.join(FORMATS)}")
+    fields = parse_fields(resource)
+    stmt = build_query(resource, fields, parse_date('from'), parse_date('to'))
+
+    return Response(
+        stream_with_context(stream_rows(stmt, output)),
+        mimetype=FORMATS[output]
+    )
+
+
+@api.route('/shows')
+def shows():
+    return stream_resource('shows')
+
+
+@api.route('/venues')
+def venues():
+    return stream_resource('venues')
+
+
+@api.route('/artists')
+def artists():
+    return stream_resource('artists')
+
+
+def parse_proposal(item):
+    """``(proposal, errors)`` for one entry of a schedule check."""
+    if not isinstance(item, dict):
+        return None, {'show': 'must be an object'}
+    proposal, errors = {}, {}
+    for name in ('venue_id', 'artist_id'):
+        value = item.get(name)
+        if isinstance(value, int) and not isinstance(value, bool):
+            proposal[name] = value
+        else:
+            errors[name] = 'must be an integer'
+    try:
+        start_time = datetime.fromisoformat(item.get('start_time'))
+    except (TypeError, ValueError):
+        errors['start_time'] = 'must be an ISO 8601 datetime'
+    else:
+        # Show times are stored as local times, without an offset.
+        if start_time.tzinfo is None:
+            proposal['start_time'] = start_time
+        else:
+            errors['start_time'] = 'must be a local time without a UTC offset'
+    duration = item.get('duration_minutes')
+    if duration is not None:
+        if isinstance(duration, int) and not isinstance(duration, bool) and 0 < duration <= MAX_SHOW_MINUTES:
+            proposal['duration_minutes'] = duration
+        else:
+            errors['duration_minutes'] = f'must be an integer from 1 to {MAX_SHOW_MINUTES}'
+    return (None, errors) if errors else (proposal, None)
+
+
+@api.route('/shows/check', methods=['POST'])
+def check_schedule():
+    """Check proposed shows for double bookings without saving them.
+
+    Takes ``{"shows": [{"venue_id", "artist_id", "start_time",
+    "duration_minutes"?}, ...]}`` and answers with one entry per show, in
+    order. An entry has ``ok`` and, if the show can't be booked, the
+    ``errors`` in it or the existing shows and other proposals it
+    ``conflicts`` with.
+    """
+    body = request.get_json(silent=True)
+    items = body.get('shows') if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        bad_request('Expected a JSON object with a "shows" list')
+    limit = current_app.config['SCHEDULE_CHECK_MAX_SHOWS']
+    if len(items) > limit:
+        bad_request(f'At most {limit} shows can be checked at once')
+
+    results = [{'ok': True} for _ in items]
+    valid = []
+    for position, item in enumerate(items):
+        proposal, errors = parse_proposal(item)
+        if errors:
+            results[position] = {'ok': False, 'errors': errors}
+        else:
+            valid.append((position, proposal))
+
+    conflicts = find_conflicts([proposal for _, proposal in valid])
+    for index, found in conflicts.items():
+        # Map positions among the valid entries back to request positions.
+        for conflict in found:
+            if 'proposal' in conflict:
+                conflict['proposal'] = valid[conflict['proposal']][0]
+        results[valid[index][0]] = {'ok': False, 'conflicts': found}
+
+    return jsonify({
+        'count': len(items),
+        'conflicting': sum(1 for result in results if 'conflicts' in result),
+        'invalid': sum(1 for result in results if 'errors' in result),
+        'shows': results,
+    })
+
+
+@api.route('/pool-stats')
+def pool_stats():
+    """Connection checkout totals for the worker process that answers.
+
+    Each worker has its own pools, so ``pid`` says which one this is.
+    Only QueuePool profiles record checkouts; SQLite and PgBouncer report
+    zeros.
+    """
+    return jsonify({'pid': os.getpid(), **current_app.extensions['pool_stats'].snapshot()})
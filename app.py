@@ -3,58 +3,93 @@
 #----------------------------------------------------------------------------#
 
 import json
-import dateutil.parser
-import babel
-from flask import Flask, render_template, request, Response, flash, redirect, url_for, abort
+from flask import Blueprint, Flask, render_template, request, Response, flash, redirect, url_for, abort
 from flask_moment import Moment
-from flask_sqlalchemy import SQLAlchemy
-import logging
-from logging import Formatter, FileHandler
-from flask_wtf import Form
-from forms import *
 from flask_migrate import Migrate
-from models import db, Venue, Artist, Show
-from config import *
+from models import db, Venue, Artist, Show, VenueShowCount
+from enums import Genre
+from services import venue_upcoming_show_counts, artist_upcoming_show_counts
+import search
+from pagination import paginate, page_url
+from advisor import db_advise_command
+from cache import response_cache, cached, cache_tags
+from filters import format_datetime
+from api import api
+from instrumentation import init_instrumentation
+from app_logging import init_logging
+from pooling import init_pooling, init_fork_safety
+from routing import init_replicas
+from importer import import_command
+from exporter import export_command
+from counters import show_counts_command
+from areas import area_directory
+from assets import init_assets, assets_command
+from compression import init_compression
+from templating import init_template_cache, warm_templates
+from scheduling import find_conflicts, is_double_booking
+from conditional import conditional, venue_validator, artist_validator, listing_validator, shows_validator
 from datetime import datetime
+from itertools import groupby
+from sqlalchemy import func
+from sqlalchemy.orm import contains_eager
 
 #----------------------------------------------------------------------------#
 # App Config.
 #----------------------------------------------------------------------------#
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object('config')
-db.init_app(app)
-migrate = Migrate(app, db)
-
-#----------------------------------------------------------------------------#
-# Models.
-#----------------------------------------------------------------------------#
-# Models are now in models.py
-
-#----------------------------------------------------------------------------#
-# Filters.
-#----------------------------------------------------------------------------#
-
-def format_datetime(value, format='medium'):
-    if isinstance(value, datetime):
-        date = value
-    else:
-        date = dateutil.parser.parse(value)
-
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale='en')
-
-app.jinja_env.filters['datetime'] = format_datetime
+moment = Moment()
+migrate = Migrate()
+main = Blueprint('main', __name__)
+
+
+def create_app(config_object='config'):
+    """Build the app.
+
+    Nothing here runs at import, so ``gunicorn --preload 'app:create_app()'``
+    builds one app, warms its templates and forks every worker from it.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    moment.init_app(app)
+    init_pooling(app)
+    init_template_cache(app)
+    db.init_app(app)
+    init_fork_safety(app)
+    init_replicas(app, db)
+    response_cache.init_app(app)
+    area_directory.init_app(app)
+    migrate.init_app(app, db)
+    app.cli.add_command(db_advise_command)
+    app.cli.add_command(import_command)
+    app.cli.add_command(export_command)
+    app.cli.add_command(show_counts_command)
+    app.cli.add_command(assets_command)
+    app.register_blueprint(main)
+    app.register_blueprint(api)
+    init_assets(app)
+    init_instrumentation(app)
+    init_compression(app)
+
+    # Models are in models.py, the datetime filter in filters.py.
+    app.jinja_env.filters['datetime'] = format_datetime
+    app.jinja_env.globals['page_url'] = page_url
+    app.jinja_env.globals['genre_choices'] = Genre.choices()
+    app.jinja_env.globals['filter_params'] = search.FILTER_PARAMS
+
+    if app.config['TEMPLATE_WARMUP']:
+        warm_templates(app)
+
+    if not app.debug:
+        init_logging(app)
+        app.logger.info('errors')
+
+    return app
 
 #----------------------------------------------------------------------------#
 # Controllers.
 #----------------------------------------------------------------------------#
 
-@app.route('/')
+@main.route('/')
 def index():
     return render_template('pages/home.html')
 
@@ -62,89 +97,121 @@ def index():
 #  Venues
 #  ----------------------------------------------------------------
 
-@app.route('/venues')
-def venues():
-    venues = Venue.query.all()
-
-    if not venues:
+def render_venue_listing(filters, area=None):
+    """Render a page of venues matching ``filters``, grouped by area."""
+    after = request.args.get('after')
+    before = request.args.get('before')
+
+    # A page of venues with their maintained upcoming-show counts, in area order.
+    query = db.session.query(
+        Venue.id,
+        Venue.name,
+        Venue.city,
+        Venue.state,
+        func.coalesce(VenueShowCount.upcoming, 0).label('num_upcoming_shows')
+    ).outerjoin(VenueShowCount, VenueShowCount.venue_id == Venue.id).filter(*filters)
+    page = paginate(query, [Venue.state, Venue.city, Venue.name, Venue.id], after=after, before=before)
+
+    if not page.items and not (after or before or filters):
         abort(404)
 
-
-    city_state_map = {}
-    for venue in venues:
-        city_state = (venue.city, venue.state)
-        if city_state not in city_state_map:
-            city_state_map[city_state] = []
-        
-        num_upcoming_shows = Show.query.filter(
-        Show.venue_id == venue.id,
-        Show.start_time > datetime.now()
-        ).count()
-
-        city_state_map[city_state].append({
-            "id": venue.id,
-            "name": venue.name,
-            "num_upcoming_shows": num_upcoming_shows
-        })
-
-# Prepare the data for rendering
+    cache_tags('venues')
     data = [
         {
             "city": city,
             "state": state,
-            "venues": venues_list
+            "url": url_for('main.venue_area', state=state, city=city),
+            "venues": [
+                {
+                    "id": row.id,
+                    "name": row.name,
+                    "num_upcoming_shows": row.num_upcoming_shows
+                }
+                for row in rows
+            ]
         }
-        for (city, state), venues_list in city_state_map.items()   
+        for (state, city), rows in groupby(page, key=lambda row: (row.state, row.city))
     ]
 
-    return render_template('pages/venues.html', areas=data)
+    return render_template('pages/venues.html', areas=data, page=page,
+                           directory=area_directory.areas(), area=area)
+
+@main.route('/venues')
+@conditional(listing_validator(Venue))
+@cached
+def venues():
+    return render_venue_listing(search.listing_filters(Venue, request.args))
+
+@main.route('/venues/area/<state>/<city>')
+@conditional(listing_validator(Venue))
+@cached
+def venue_area(state, city):
+    if area_directory.get(state, city) is None:
+        abort(404)
+    filters = [Venue.state == state, Venue.city == city]
+    filters += search.listing_filters(Venue, request.args)
+    return render_venue_listing(filters, area=(state, city))
 
-@app.route('/venues/search', methods=['POST'])
+@main.route('/venues/search', methods=['POST'])
 def search_venues():
     search_term = request.form.get('search_term', '').strip()
 
-    venues = Venue.query.filter(Venue.name.ilike(f'%{search_term}%')).all()
+    filters = search.listing_filters(Venue, request.values)
+    venues, more = search.search_results(Venue, search_term, filters=filters)
+    counts = venue_upcoming_show_counts([venue.id for venue in venues])
     response = {
     "count": len(venues),
-    "data": []
-    }
-
-    for venue in venues:
-        num_upcoming_shows = Show.query.filter(
-            Show.venue_id == venue.id,
-            Show.start_time > datetime.now()
-        ).count()
-        response["data"].append({
+    "more": more,
+    "data": [
+        {
             "id": venue.id,
             "name": venue.name,
-            "num_upcoming_shows": num_upcoming_shows
-            })
+            "num_upcoming_shows": counts[venue.id]
+        }
+        for venue in venues
+    ]
+    }
     return render_template('pages/search_venues.html', results=response, search_term=search_term)
 
-@app.route('/venues/<int:venue_id>')
+@main.route('/venues/<int:venue_id>')
+@conditional(venue_validator)
+@cached
 def show_venue(venue_id):
-    shows = db.session.query(Show) \
-        .join(Artist) \
-        .filter(Show.venue_id == venue_id) \
-        .all()
+    now = datetime.now()
+
+    # Venue, its shows (ordered by start_time) and each show's artist in one round trip.
+    venue = db.session.execute(
+        db.select(Venue)
+        .outerjoin(Venue.shows)
+        .outerjoin(Show.artist)
+        .options(
+            contains_eager(Venue.shows).load_only(Show.start_time),
+            contains_eager(Venue.shows).contains_eager(Show.artist)
+                .load_only(Artist.id, Artist.name, Artist.image_link)
+        )
+        .filter(Venue.id == venue_id)
+        .order_by(Show.start_time)
+    ).unique().scalar_one_or_none()
+
+    if venue is None:
+        abort(404)
 
+    cache_tags(f'venue:{venue.id}', *(f'artist:{show.artist.id}' for show in venue.shows))
     past_shows = []
     upcoming_shows = []
 
-    for show in shows:
+    for show in venue.shows:
         show_details = {
             "artist_id": show.artist.id,
             "artist_name": show.artist.name,
             "artist_image_link": show.artist.image_link,
             "start_time": show.start_time
         }
-        if show.start_time < datetime.now():
+        if show.start_time < now:
             past_shows.append(show_details)
         else:
             upcoming_shows.append(show_details)
 
-    venue = db.session.query(Venue).filter(Venue.id == venue_id).first_or_404()
-
     data = {
         "id": venue.id,
         "name": venue.name,
@@ -169,13 +236,15 @@ def show_venue(venue_id):
 #  Create Venue
 #  ----------------------------------------------------------------
 
-@app.route('/venues/create', methods=['GET'])
+@main.route('/venues/create', methods=['GET'])
 def create_venue_form():
+    from forms import VenueForm
     form = VenueForm()
     return render_template('forms/new_venue.html', form=form)
 
-@app.route('/venues/create', methods=['POST'])
+@main.route('/venues/create', methods=['POST'])
 def create_venue_submission():
+    from forms import VenueForm
     form = VenueForm(request.form, meta={'csrf': False})
     if form.validate():
         try:
@@ -206,7 +275,7 @@ def create_venue_submission():
             db.session.close()
             return render_template('pages/home.html')
 
-@app.route('/venues/<venue_id>', methods=['DELETE'])
+@main.route('/venues/<venue_id>', methods=['DELETE'])
 def delete_venue(venue_id):
     venue = Venue.query.get(venue_id)
     if venue:
@@ -218,67 +287,87 @@ def delete_venue(venue_id):
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route('/artists')
+@main.route('/artists')
+@conditional(listing_validator(Artist))
 def artists():
-    artists = Artist.query.all()
+    after = request.args.get('after')
+    before = request.args.get('before')
+    filters = search.listing_filters(Artist, request.args)
+    query = db.session.query(Artist.id, Artist.name).filter(*filters)
+    page = paginate(query, [Artist.name, Artist.id], after=after, before=before)
 
-    if not artists:
+    if not page.items and not (after or before or filters):
         abort(404)
 
     data = [{
     "id": artist.id,
     "name": artist.name
     }
-    for artist in artists
+    for artist in page
     ]
-    return render_template('pages/artists.html', artists=data)
+    return render_template('pages/artists.html', artists=data, page=page)
 
-@app.route('/artists/search', methods=['POST'])
+@main.route('/artists/search', methods=['POST'])
 def search_artists():
     search_term = request.form.get('search_term', '').strip()
-    artists = Artist.query.filter(Artist.name.ilike(f'%{search_term}%')).all()
+    filters = search.listing_filters(Artist, request.values)
+    artists, more = search.search_results(Artist, search_term, filters=filters)
+    counts = artist_upcoming_show_counts([artist.id for artist in artists])
     data =[
     {
         "id": artist.id,
         "name": artist.name,
-        "num_upcoming_shows": Show.query.filter(
-        Show.artist_id == artist.id,
-        Show.start_time > datetime.now()).count()
+        "num_upcoming_shows": counts[artist.id]
     }
     for artist in artists
     ]
     response = {
     "count": len(artists),
+    "more": more,
     "data": data
     }
 
     return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
 
-@app.route('/artists/<int:artist_id>')
+@main.route('/artists/<int:artist_id>')
+@conditional(artist_validator)
+@cached
 def show_artist(artist_id):
-    
-    shows = db.session.query(Show) \
-        .join(Venue) \
-        .filter(Show.artist_id == artist_id) \
-        .all()
+    now = datetime.now()
+
+    # Artist, its shows (ordered by start_time) and each show's venue in one round trip.
+    artist = db.session.execute(
+        db.select(Artist)
+        .outerjoin(Artist.shows)
+        .outerjoin(Show.venue)
+        .options(
+            contains_eager(Artist.shows).load_only(Show.start_time),
+            contains_eager(Artist.shows).contains_eager(Show.venue)
+                .load_only(Venue.id, Venue.name, Venue.image_link)
+        )
+        .filter(Artist.id == artist_id)
+        .order_by(Show.start_time)
+    ).unique().scalar_one_or_none()
+
+    if artist is None:
+        abort(404)
 
+    cache_tags(f'artist:{artist.id}', *(f'venue:{show.venue.id}' for show in artist.shows))
     past_shows = []
     upcoming_shows = []
 
-    for show in shows:
+    for show in artist.shows:
         show_details = {
             "venue_id": show.venue.id,
             "venue_name": show.venue.name,
             "venue_image_link": show.venue.image_link,
             "start_time": show.start_time
         }
-        if show.start_time > datetime.now():
+        if show.start_time > now:
             upcoming_shows.append(show_details)
         else:
             past_shows.append(show_details)
 
-    artist = db.session.query(Artist).filter(Artist.id == artist_id).first_or_404()
-
     data = {
         "id": artist.id,
         "name": artist.name,
@@ -301,8 +390,9 @@ def show_artist(artist_id):
 
 #  Update
 #  ----------------------------------------------------------------
-@app.route('/artists/<int:artist_id>/edit', methods=['GET'])
+@main.route('/artists/<int:artist_id>/edit', methods=['GET'])
 def edit_artist(artist_id):
+    from forms import ArtistForm
     form = ArtistForm()
     artist = Artist.query.get_or_404(artist_id)
 
@@ -319,7 +409,7 @@ def edit_artist(artist_id):
 
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
-@app.route('/artists/<int:artist_id>/edit', methods=['POST'])
+@main.route('/artists/<int:artist_id>/edit', methods=['POST'])
 def edit_artist_submission(artist_id):
     artist = Artist.query.get_or_404(artist_id)
     form_data = request.form
@@ -343,11 +433,12 @@ def edit_artist_submission(artist_id):
             db.session.rollback()
             flash(f'An error occurred: {e}')
     
-    return redirect(url_for('show_artist', artist_id=artist.id))
+    return redirect(url_for('main.show_artist', artist_id=artist.id))
 
 
-@app.route('/venues/<int:venue_id>/edit', methods=['GET'])
+@main.route('/venues/<int:venue_id>/edit', methods=['GET'])
 def edit_venue(venue_id):
+    from forms import VenueForm
     venue = Venue.query.get_or_404(venue_id)
     form = VenueForm()
 
@@ -365,7 +456,7 @@ def edit_venue(venue_id):
 
     return render_template('forms/edit_venue.html', form=form, venue=venue)
 
-@app.route('/venues/<int:venue_id>/edit', methods=['POST'])
+@main.route('/venues/<int:venue_id>/edit', methods=['POST'])
 def edit_venue_submission(venue_id):
     venue = Venue.query.get_or_404(venue_id)
     form_data = request.form
@@ -390,18 +481,20 @@ def edit_venue_submission(venue_id):
             db.session.rollback()
             flash(f'An error occurred: {e}')
 
-    return redirect(url_for('show_venue', venue_id=venue.id))
+    return redirect(url_for('main.show_venue', venue_id=venue.id))
 
 #  Create Artist
 #  ----------------------------------------------------------------
 
-@app.route('/artists/create', methods=['GET'])
+@main.route('/artists/create', methods=['GET'])
 def create_artist_form():
+    from forms import ArtistForm
     form = ArtistForm()
     return render_template('forms/new_artist.html', form=form)
 
-@app.route('/artists/create', methods=['POST'])
+@main.route('/artists/create', methods=['POST'])
 def create_artist_submission():
+    from forms import ArtistForm
     form = ArtistForm(request.form, meta={'csrf':False})
 
     if form.validate():
@@ -427,89 +520,111 @@ def create_artist_submission():
         finally:
             db.session.close()
 
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
 #  Shows
 #  ----------------------------------------------------------------
 
-@app.route('/shows')
+@main.route('/shows')
+@conditional(shows_validator)
 def shows():
-    shows = Show.query.all()
-
-    if not shows:
+    after = request.args.get('after')
+    before = request.args.get('before')
+    query = db.session.query(
+        Show.id,
+        Show.start_time,
+        Venue.id.label('venue_id'),
+        Venue.name.label('venue_name'),
+        Artist.id.label('artist_id'),
+        Artist.name.label('artist_name'),
+        Artist.image_link.label('artist_image_link')
+    ).join(Venue, Show.venue_id == Venue.id) \
+        .join(Artist, Show.artist_id == Artist.id)
+    page = paginate(query, [Show.start_time, Show.id], after=after, before=before)
+
+    if not page.items and not (after or before):
         abort(404)
 
-    data = []
-    for show in shows:
-        venue = show.venue
-        artist = show.artist
-        data.append({
-            "venue_id": venue.id,
-            "venue_name": venue.name,
-            "artist_id": artist.id,
-            "artist_name": artist.name,
-            "artist_image_link": artist.image_link,
-            "start_time": show.start_time
-        })
+    data = [{
+        "venue_id": show.venue_id,
+        "venue_name": show.venue_name,
+        "artist_id": show.artist_id,
+        "artist_name": show.artist_name,
+        "artist_image_link": show.artist_image_link,
+        "start_time": show.start_time
+    }
+    for show in page
+    ]
 
-    return render_template('pages/shows.html', shows=data)
+    return render_template('pages/shows.html', shows=data, page=page)
 
-@app.route('/shows/create')
+@main.route('/shows/create')
 def create_shows():
+    from forms import ShowForm
     form = ShowForm()
     return render_template('forms/new_show.html', form=form)
 
-@app.route('/shows/create', methods=['POST'])
+@main.route('/shows/create', methods=['POST'])
 def create_show_submission():
+    from forms import ShowForm
     form = ShowForm(request.form, meta={'csrf': False})
     if form.validate():
         try:
-            new_show = Show(
-            venue_id = form.venue_id.data,
-            artist_id = form.artist_id.data,
-            start_time = form.start_time.data
-            )
+            proposal = {
+                'venue_id': int(form.venue_id.data),
+                'artist_id': int(form.artist_id.data),
+                'start_time': form.start_time.data,
+                'duration_minutes': form.duration_minutes.data,
+            }
+        except (TypeError, ValueError):
+            flash('Show could not be listed: venue and artist IDs must be numbers.')
+            return render_template('forms/new_show.html', form=form)
+
+        # One indexed query; on Postgres the exclusion constraints also
+        # catch a booking that races this check.
+        conflicts = find_conflicts([proposal]).get(0)
+        if conflicts:
+            booked = sorted({conflict['resource'].split('_')[0] for conflict in conflicts}, reverse=True)
+            flash(f"Show could not be listed: the {' and '.join(booked)} "
+                  f"{'are' if len(booked) > 1 else 'is'} already booked at that time.")
+            return render_template('forms/new_show.html', form=form)
+
+        try:
+            new_show = Show(**proposal)
             db.session.add(new_show) 
             db.session.commit()
             flash('Show was successfully listed!') 
         except Exception as e:
             db.session.rollback()
-            flash(f'An error occurred. Show could not be listed. Error: {str(e)}')
+            if is_double_booking(e):
+                flash('Show could not be listed: the venue or artist has just been booked for that time.')
+            else:
+                flash(f'An error occurred. Show could not be listed. Error: {str(e)}')
         finally:
             db.session.close() 
 
-    return redirect(url_for('index'))
+    return redirect(url_for('main.index'))
 
-@app.errorhandler(404)
+@main.app_errorhandler(404)
 def not_found_error(error):
     return render_template('errors/404.html'), 404
 
-@app.errorhandler(500)
+@main.app_errorhandler(500)
 def server_error(error):
     return render_template('errors/500.html'), 500
 
 
-if not app.debug:
-    file_handler = FileHandler('error.log')
-    file_handler.setFormatter(
-        Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
-    )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info('errors')
-
 #----------------------------------------------------------------------------#
 # Launch.
 #----------------------------------------------------------------------------#
 
 # Default port:
 if __name__ == '__main__':
-    app.run()
+    create_app().run()
 # Or specify port manually:
 '''
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    app.run(host='0.0.0.0', port=port)
+    create_app().run(host='0.0.0.0', port=port)
 '''
 
@@ -0,0 +1,162 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import weakref
+from datetime import datetime, timezone
+from logging.handlers import (
+    QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler, WatchedFileHandler
+)
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, source and traceback."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'path': record.pathname,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller on a full queue.
+
+    ``drop-new`` discards the incoming record; ``drop-oldest`` evicts the
+    oldest queued record to make room. Either way ``dropped`` is bumped.
+    """
+
+    POLICIES = ('drop-new', 'drop-oldest')
+
+    def __init__(self, queue_, policy='drop-new'):
+        if policy not in self.POLICIES:
+            raise ValueError(f'Unknown drop policy {policy!r}; expected one of {self.POLICIES}')
+        super().__init__(queue_)
+        self.policy = policy
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Resolve the message and traceback now, on the request thread, but
+        # keep them as separate fields for the JSON formatter.
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if self.policy == 'drop-oldest':
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+                self.dropped += 1
+                return
+            except (queue.Empty, queue.Full):
+                pass
+        self.dropped += 1
+
+
+def worker_log_file(path):
+    """``LOG_FILE`` for this process, e.g. ``error.1234.log``."""
+    root, ext = os.path.splitext(path)
+    return f'{root}.{os.getpid()}{ext}'
+
+
+def build_file_handler(config, worker=False):
+    """File handler for ``LOG_FILE``; ``worker`` is a process forked from the app.
+
+    With LOG_ROTATION=external every process appends to ``LOG_FILE`` and
+    reopens it once logrotate (or similar) has moved it. Otherwise the
+    handler rotates the file itself, which is only safe with one writer,
+    so each forked worker gets a file of its own.
+    """
+    path = config['LOG_FILE']
+    rotation = config['LOG_ROTATION']
+    if rotation == 'external':
+        handler = WatchedFileHandler(path, delay=True)
+    elif rotation == 'time':
+        handler = TimedRotatingFileHandler(
+            worker_log_file(path) if worker else path,
+            when=config['LOG_ROTATE_WHEN'], backupCount=config['LOG_BACKUP_COUNT'], delay=True
+        )
+    else:
+        handler = RotatingFileHandler(
+            worker_log_file(path) if worker else path,
+            maxBytes=config['LOG_MAX_BYTES'], backupCount=config['LOG_BACKUP_COUNT'], delay=True
+        )
+    handler.setFormatter(JSONFormatter())
+    return handler
+
+
+def start_queue_listener(queue_handler, handler, size):
+    """Give ``queue_handler`` a fresh queue of ``size``, drained into ``handler`` by a new thread."""
+    records = queue.Queue(maxsize=size)
+    queue_handler.queue = records
+    listener = QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+def start_listener(app, queue_handler, worker=False):
+    """Give ``queue_handler`` a fresh queue, drained to ``LOG_FILE`` by a new listener thread."""
+    config = app.config
+    listener = start_queue_listener(
+        queue_handler, build_file_handler(config, worker), config['LOG_QUEUE_SIZE']
+    )
+    app.extensions['log_listener'] = listener
+    return listener
+
+
+# Apps whose log listener is restarted in forked children. Held weakly,
+# and os.register_at_fork is called once here rather than per app, so
+# test suites that build many apps don't pile up fork hooks.
+_logging_apps = weakref.WeakSet()
+
+
+def _restart_listeners():
+    for app in list(_logging_apps):
+        start_listener(app, app.extensions['log_queue_handler'], worker=True)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listeners)
+
+
+def init_logging(app):
+    """Route ``app.logger`` through a bounded queue to a background file writer.
+
+    Request threads only enqueue records; a QueueListener thread formats
+    them as JSON and writes them to ``LOG_FILE`` (see ``build_file_handler``).
+
+    Threads don't survive fork(), so a worker forked from a preloaded app
+    starts its own queue, file handler and listener.
+    """
+    config = app.config
+    queue_handler = DroppingQueueHandler(None, policy=config['LOG_DROP_POLICY'])
+    queue_handler.setLevel(config['LOG_LEVEL'])
+    app.extensions['log_queue_handler'] = queue_handler
+    listener = start_listener(app, queue_handler)
+    _logging_apps.add(app)
+
+    app.logger.setLevel(config['LOG_LEVEL'])
+    app.logger.addHandler(queue_handler)
+    return listener
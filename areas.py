@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import namedtuple
+from flask import url_for
+from sqlalchemy import event, exists, func, inspect, select
+from sqlalchemy.orm import Session
+from models import db, Venue
+
+Area = namedtuple('Area', 'state city venue_count url')
+
+
+class AreaDirectory:
+    """Every (state, city) with venues, and how many, in display order.
+
+    Built with one GROUP BY query and kept as a tuple of ``Area`` entries
+    (drill-down URL included, so pages don't rebuild one per area) until
+    a committed change adds, removes or moves a venue. Like the response
+    cache it is per worker process, so other workers pick up a change after
+    AREA_DIRECTORY_TTL seconds; an area that gained its first venue there is
+    found straight away (see ``get``).
+    """
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._areas = None
+        self._index = {}
+        self._built_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.ttl = app.config['AREA_DIRECTORY_TTL']
+        app.extensions['area_directory'] = self
+
+    def build(self):
+        rows = db.session.execute(
+            select(Venue.state, Venue.city, func.count(Venue.id))
+            .group_by(Venue.state, Venue.city)
+            .order_by(Venue.state, Venue.city)
+        ).all()
+        return tuple(
+            Area(state, city, count, url_for('main.venue_area', state=state, city=city))
+            for state, city, count in rows
+        )
+
+    def areas(self):
+        with self._lock:
+            if self._areas is not None and time.monotonic() - self._built_at < self.ttl:
+                return self._areas
+        areas = self.build()
+        with self._lock:
+            self._areas = areas
+            self._index = {(area.state, area.city): area for area in areas}
+            self._built_at = time.monotonic()
+        return areas
+
+    def get(self, state, city):
+        """The ``Area`` for ``state`` and ``city``, or None if it has no venues.
+
+        A miss is checked against the database before it's believed, as
+        another worker may have added the area's first venue since the
+        directory was built; if so the directory is rebuilt.
+        """
+        self.areas()
+        area = self._index.get((state, city))
+        if area is None and db.session.scalar(
+            select(exists().where(Venue.state == state, Venue.city == city))
+        ):
+            self.invalidate()
+            self.areas()
+            area = self._index.get((state, city))
+        return area
+
+    def invalidate(self):
+        with self._lock:
+            self._areas = None
+
+
+area_directory = AreaDirectory()
+
+
+def _moves_area(obj, session):
+    if not isinstance(obj, Venue):
+        return False
+    if obj in session.new or obj in session.deleted:
+        return True
+    state = inspect(obj)
+    return state.attrs.city.history.has_changes() or state.attrs.state.history.has_changes()
+
+
+@event.listens_for(Session, 'after_flush')
+def _note_area_changes(session, flush_context):
+    if any(_moves_area(obj, session) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['areas_changed'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _rebuild_areas(session):
+    if session.info.pop('areas_changed', False):
+        area_directory.invalidate()
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_area_changes(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('areas_changed', None)
@@ -0,0 +1,153 @@
+"""Bundled, fingerprinted and precompressed static assets.
+
+``flask assets`` concatenates each bundle's files, minifies them, and
+writes ``static/dist/<name>.<hash>.<ext>`` plus ``.gz`` (and ``.br`` when
+the brotli package is installed) copies. It also writes a manifest that
+maps bundle names to those files. Templates call ``asset_urls(bundle)``,
+which returns the built file when a manifest exists and the separate
+source files otherwise, so development works without a build.
+
+Built files never change under the same name, so they are served with a
+year-long ``immutable`` Cache-Control and in the best encoding the client
+accepts.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import click
+from flask import current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# bundle name -> source files under static/, in load order
+BUNDLES = {
+    'main.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    'head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+    ],
+    # Deferred scripts run in document order after jQuery has loaded.
+    'deferred.js': [
+        'js/script.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+    ],
+}
+DIST_DIR = 'dist'
+MANIFEST = 'manifest.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    source = re.sub(r'\s*([{};,])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip()
+
+
+def minify_js(source):
+    # Only whitespace and whole-line comments; anything smarter needs a parser.
+    lines = (line.strip() for line in source.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+def build_bundle(static_folder, name, files):
+    """Write one bundle and its compressed copies; returns its path under static/."""
+    minify = minify_css if name.endswith('.css') else minify_js
+    parts = []
+    for path in files:
+        with open(os.path.join(static_folder, path), encoding='utf-8') as f:
+            source = f.read()
+        parts.append(source if '.min.' in path else minify(source))
+    # A newline plus ';' keeps one JS file's last statement from running into the next.
+    separator = '\n' if name.endswith('.css') else '\n;\n'
+    data = separator.join(parts).encode('utf-8')
+
+    stem, ext = os.path.splitext(name)
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    filename = f'{stem}.{digest}{ext}'
+    out_dir = os.path.join(static_folder, DIST_DIR)
+    path = os.path.join(out_dir, filename)
+    with open(path, 'wb') as f:
+        f.write(data)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(data, quality=11))
+    return f'{DIST_DIR}/{filename}', len(data)
+
+
+def load_manifest(static_folder):
+    path = os.path.join(static_folder, DIST_DIR, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def asset_urls(name):
+    """URLs to include for bundle ``name``: the built file, or its sources."""
+    manifest = current_app.extensions['assets_manifest']
+    if name in manifest:
+        return [url_for('static', filename=manifest[name])]
+    return [url_for('static', filename=path) for path in BUNDLES[name]]
+
+
+def send_dist_asset(filename):
+    """Serve a built asset, precompressed when the client accepts it."""
+    directory = os.path.join(current_app.static_folder, DIST_DIR)
+    encoding = None
+    for candidate, suffix in ENCODINGS:
+        if candidate in request.accept_encodings and os.path.exists(os.path.join(directory, filename + suffix)):
+            encoding = candidate
+            break
+    if encoding is None:
+        response = send_from_directory(directory, filename)
+    else:
+        response = send_from_directory(directory, filename + dict(ENCODINGS)[encoding])
+        response.headers['Content-Encoding'] = encoding
+        response.mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response.headers['Cache-Control'] = IMMUTABLE
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+@click.command('assets')
+def assets_command():
+    """Bundle, minify and fingerprint CSS and JS into static/dist."""
+    static_folder = current_app.static_folder
+    out_dir = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(out_dir, exist_ok=True)
+
+    manifest = {}
+    for name, files in BUNDLES.items():
+        manifest[name], size = build_bundle(static_folder, name, files)
+        click.echo(f'{name}: {len(files)} files -> {manifest[name]} ({size:,} bytes)')
+    if brotli is None:
+        click.echo('brotli is not installed; wrote gzip copies only (pip install brotli).')
+
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    current_app.extensions['assets_manifest'] = manifest
+
+
+def init_assets(app):
+    """Load the manifest and serve static/dist with long-lived cache headers."""
+    app.extensions['assets_manifest'] = load_manifest(app.static_folder)
+    app.add_url_rule(f'{app.static_url_path}/{DIST_DIR}/<path:filename>', 'dist_asset', send_dist_asset)
+    app.jinja_env.globals['asset_urls'] = asset_urls
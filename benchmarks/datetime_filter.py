@@ -0,0 +1,67 @@
+"""Micro-benchmark for the ``datetime`` Jinja filter.
+
+Formats a /shows-sized batch of timestamps with the original filter
+(dateutil + babel.dates.format_datetime on every call) and with
+``filters.format_datetime``, and prints calls per second for each.
+
+    python -m benchmarks.datetime_filter --calls 20000 --distinct 500
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+import babel.dates
+import dateutil.parser
+from filters import format_datetime
+
+
+def legacy_format_datetime(value, format='medium'):
+    if isinstance(value, datetime):
+        date = value
+    else:
+        date = dateutil.parser.parse(value)
+
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale='en')
+
+
+def make_values(calls, distinct, as_strings, seed=0):
+    rng = random.Random(seed)
+    start = datetime(2025, 1, 1, 20, 0)
+    pool = [start + timedelta(hours=rng.randrange(24 * 365)) for _ in range(distinct)]
+    if as_strings:
+        pool = [value.isoformat() for value in pool]
+    return [rng.choice(pool) for _ in range(calls)]
+
+
+def throughput(func, values, format):
+    started = time.perf_counter()
+    for value in values:
+        func(value, format)
+    return len(values) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--distinct', type=int, default=500,
+                        help='distinct timestamps among the calls')
+    args = parser.parse_args()
+
+    for as_strings in (False, True):
+        values = make_values(args.calls, args.distinct, as_strings)
+        for format in ('full', 'medium'):
+            format_datetime.cache_clear()
+            before = throughput(legacy_format_datetime, values, format)
+            after = throughput(format_datetime, values, format)
+            assert legacy_format_datetime(values[0], format) == format_datetime(values[0], format)
+            kind = 'str' if as_strings else 'datetime'
+            print(f'{kind:>8} {format:>6}: {before:>10,.0f}/s before  '
+                  f'{after:>12,.0f}/s after  ({after / before:,.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
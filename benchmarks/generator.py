@@ -0,0 +1,164 @@
+"""Seeded synthetic data for benchmarks and query-plan checks.
+
+Fills the configured database with N venues, artists and shows. The same
+seed always produces the same rows, so runs are comparable across commits.
+
+    DATABASE_URL=sqlite:////tmp/fyyur.db python -m benchmarks.generator --shows 100000
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from enums import Genre, State
+
+BATCH_SIZE = 10000
+
+ADJECTIVES = ['Blue', 'Golden', 'Electric', 'Velvet', 'Rusty', 'Silver', 'Midnight',
+              'Crimson', 'Lucky', 'Wild', 'Hidden', 'Neon', 'Broken', 'Quiet', 'Royal']
+NOUNS = ['Room', 'Hall', 'Lounge', 'Garage', 'Cellar', 'Attic', 'Stage', 'Barn',
+         'Tavern', 'Club', 'Theatre', 'Warehouse', 'Garden', 'Dock', 'Chapel']
+BANDS = ['Owls', 'Saints', 'Wolves', 'Machines', 'Sparrows', 'Rebels', 'Tides',
+         'Ghosts', 'Comets', 'Strangers', 'Kings', 'Drifters', 'Echoes', 'Foxes']
+CITIES = [('San Francisco', 'CA'), ('Los Angeles', 'CA'), ('New York', 'NY'),
+          ('Brooklyn', 'NY'), ('Austin', 'TX'), ('Houston', 'TX'), ('Chicago', 'IL'),
+          ('Seattle', 'WA'), ('Portland', 'OR'), ('Denver', 'CO'), ('Nashville', 'TN'),
+          ('New Orleans', 'LA'), ('Atlanta', 'GA'), ('Boston', 'MA'), ('Miami', 'FL')]
+GENRES = [genre.name for genre in Genre]
+STATES = [state.value for state in State]
+
+
+def _batches(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _city(rng):
+    # One row in five gets a made-up city, giving the area directory a long tail.
+    if rng.random() < 0.8:
+        return rng.choice(CITIES)
+    return (f'{rng.choice(ADJECTIVES)}ville', rng.choice(STATES))
+
+
+def venue_rows(count, rng):
+    for i in range(count):
+        city, state = _city(rng)
+        yield {
+            'name': f'The {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}',
+            'city': city,
+            'state': state,
+            'address': f'{rng.randint(1, 9999)} {rng.choice(ADJECTIVES)} St',
+            'phone': f'{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+            'image_link': f'https://images.example.com/venues/{i}.jpg',
+            'facebook_link': f'https://www.facebook.com/venue{i}',
+            'website_link': f'https://venue{i}.example.com',
+            'seeking_talent': rng.random() < 0.5,
+            'seeking_description': 'We are looking for local artists.',
+            'genres': rng.sample(GENRES, rng.randint(1, 3)),
+        }
+
+
+def artist_rows(count, rng):
+    for i in range(count):
+        city, state = _city(rng)
+        yield {
+            'name': f'{rng.choice(ADJECTIVES)} {rng.choice(BANDS)} {i}',
+            'city': city,
+            'state': state,
+            'phone': f'{rng.randint(200, 999)}-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}',
+            'image_link': f'https://images.example.com/artists/{i}.jpg',
+            'facebook_link': f'https://www.facebook.com/artist{i}',
+            'website': f'https://artist{i}.example.com',
+            'seeking_venue': rng.random() < 0.5,
+            'seeking_description': 'Looking for shows to perform at.',
+            'genres': rng.sample(GENRES, rng.randint(1, 3)),
+        }
+
+
+def show_rows(count, venue_ids, artist_ids, rng, now):
+    # Shows spread over a year either side of now, so listings have both
+    # past and upcoming shows. They start on the hour and last the default
+    # two hours; draws that would double-book a venue or artist (which
+    # Postgres rejects) are redrawn.
+    from models import DEFAULT_SHOW_MINUTES
+
+    span = 365 * 24
+    hours = DEFAULT_SHOW_MINUTES // 60
+    booked = set()
+    for _ in range(count):
+        while True:
+            venue_id, artist_id = rng.choice(venue_ids), rng.choice(artist_ids)
+            hour = rng.randint(-span, span)
+            slots = [(key, hour + offset) for key in (('venue', venue_id), ('artist', artist_id))
+                     for offset in range(hours)]
+            if not booked.intersection(slots):
+                break
+        booked.update(slots)
+        yield {
+            'venue_id': venue_id,
+            'artist_id': artist_id,
+            'start_time': now + timedelta(hours=hour),
+            'duration_minutes': DEFAULT_SHOW_MINUTES,
+        }
+
+
+def generate(shows, venues=None, artists=None, seed=0, now=None):
+    """Insert the synthetic catalogue; needs an app context. Returns row counts."""
+    from models import db, Venue, Artist, Show
+    from counters import rebuild_counts
+
+    rng = random.Random(seed)
+    venues = venues if venues is not None else max(1, shows // 20)
+    artists = artists if artists is not None else max(1, shows // 10)
+    if now is None:
+        now = datetime.now().replace(minute=0, second=0, microsecond=0)
+
+    for model, rows in ((Venue, venue_rows(venues, rng)), (Artist, artist_rows(artists, rng))):
+        for batch in _batches(rows):
+            db.session.execute(insert(model), batch)
+    db.session.commit()
+
+    venue_ids = [row[0] for row in db.session.query(Venue.id)]
+    artist_ids = [row[0] for row in db.session.query(Artist.id)]
+    for batch in _batches(show_rows(shows, venue_ids, artist_ids, rng, now)):
+        db.session.execute(insert(Show), batch)
+        db.session.commit()
+
+    rebuild_counts(db.session.connection(), now)
+    db.session.commit()
+
+    return {'venues': venues, 'artists': artists, 'shows': shows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed the DATABASE_URL database with synthetic data.')
+    parser.add_argument('--shows', type=int, default=1000)
+    parser.add_argument('--venues', type=int, help='default: shows / 20')
+    parser.add_argument('--artists', type=int, help='default: shows / 10')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--create-all', action='store_true',
+                        help='create tables first (use migrations for Postgres)')
+    args = parser.parse_args()
+
+    from app import create_app
+    from models import db
+
+    app = create_app()
+    with app.app_context():
+        if args.create_all:
+            db.create_all()
+        started = time.perf_counter()
+        counts = generate(args.shows, args.venues, args.artists, args.seed)
+        elapsed = time.perf_counter() - started
+    print(f"Inserted {counts['venues']} venues, {counts['artists']} artists, "
+          f"{counts['shows']} shows in {elapsed:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Import-time profile of the app.
+
+Runs ``from app import create_app; create_app()`` in a fresh interpreter
+under ``python -X importtime`` and reports the slowest imports by
+cumulative time. A module's cumulative time includes everything it
+imported first, so only modules the app itself loaded (``--depth 1``) add
+up to the total.
+
+    python -m benchmarks.import_profile
+    python -m benchmarks.import_profile --depth 2 --top 40 --output imports.json
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+SNIPPET = 'from app import create_app; create_app()'
+
+
+def profile_imports():
+    """``(total_ms, [(depth, name, self_ms, cumulative_ms), ...])`` for one cold start."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', SNIPPET],
+        capture_output=True, text=True, check=True,
+    )
+    total_ms = (time.perf_counter() - started) * 1000
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        # Nesting is shown by two spaces per level after the first.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((depth, name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return total_ms, imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Profile module import times for the app.')
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--depth', type=int, default=1,
+                        help='deepest nesting level to list; 0 is the interpreter itself')
+    parser.add_argument('--output', help='also write the full profile to this JSON file')
+    args = parser.parse_args()
+
+    total_ms, imports = profile_imports()
+    shown = sorted((row for row in imports if row[0] <= args.depth), key=lambda row: -row[3])
+
+    print(f"{'module':<48} {'self ms':>9} {'cumulative ms':>14}")
+    for depth, name, self_ms, cumulative_ms in shown[:args.top]:
+        print(f"{'  ' * depth + name:<48} {self_ms:>9.1f} {cumulative_ms:>14.1f}")
+    imported_ms = sum(row[3] for row in imports if row[0] == 0)
+    print(f'\n{len(imports)} modules, {imported_ms:.0f} ms importing; '
+          f'{total_ms:.0f} ms to start, import and build the app')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'total_ms': round(total_ms, 1),
+                'imports': [
+                    {'depth': depth, 'module': name, 'self_ms': self_ms, 'cumulative_ms': cumulative_ms}
+                    for depth, name, self_ms, cumulative_ms in imports
+                ],
+            }, f, indent=2)
+        print(f'Wrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,282 @@
+"""Route benchmark: latency, query count, bytes and memory for every route.
+
+Builds a database at the requested scale with ``benchmarks.generator``,
+drives each route in app.py through the Flask test client and writes the
+results to a JSON file. Pass ``--compare`` with an earlier results file to
+print the change per route.
+
+Requests send ``Accept-Encoding: --encoding`` (gzip by default). Each
+route reports the body size before compression (``bytes``) and on the
+wire (``wire_bytes``), CPU time per request, and the extra CPU time
+compression costs compared with an identity request. The ``startup``
+section times fresh worker processes (see ``benchmarks.startup``): app
+import, template warm-up and the first request to a few pages, with no
+bytecode cache, a cold one and a warm one.
+
+    python -m benchmarks.run --shows 10000 --output bench.json
+    python -m benchmarks.run --shows 10000 --output new.json --compare bench.json
+"""
+import argparse
+import gzip
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+# Form bodies for the POST routes, given the sample venue/artist ids and area.
+FORM_DATA = {
+    'main.search_venues': lambda ids: {'search_term': 'the'},
+    'main.search_artists': lambda ids: {'search_term': 'the'},
+    'main.create_venue_submission': lambda ids: {
+        'name': 'Benchmark Venue', 'city': 'San Francisco', 'state': 'CA',
+        'address': '1 Bench St', 'phone': '415-555-0100', 'genres': ['Jazz'],
+        'facebook_link': 'https://www.facebook.com/bench', 'seeking_talent': 'y',
+    },
+    'main.create_artist_submission': lambda ids: {
+        'name': 'Benchmark Artist', 'city': 'San Francisco', 'state': 'CA',
+        'phone': '415-555-0101', 'genres': ['Jazz'],
+        'facebook_link': 'https://www.facebook.com/bench',
+    },
+    'main.create_show_submission': lambda ids: {
+        'venue_id': ids['venue_id'], 'artist_id': ids['artist_id'],
+        'start_time': '2031-01-01 20:00:00',
+    },
+    'main.edit_venue_submission': lambda ids: {
+        'name': 'Benchmark Venue (edited)', 'city': 'San Francisco', 'state': 'CA',
+        'address': '1 Bench St', 'phone': '415-555-0100', 'genres': ['Jazz'],
+    },
+    'main.edit_artist_submission': lambda ids: {
+        'name': 'Benchmark Artist (edited)', 'city': 'San Francisco', 'state': 'CA',
+        'genres': ['Jazz'],
+    },
+}
+
+# JSON bodies for POST routes that only read: 200 proposed shows spread over
+# the first 50 venues and 100 artists, with some clashing.
+JSON_DATA = {
+    'api.check_schedule': lambda ids: {'shows': [
+        {
+            'venue_id': ids['venue_id'] + i % 50,
+            'artist_id': ids['artist_id'] + i % 100,
+            'start_time': f'2030-01-{1 + i % 28:02d}T{12 + i % 10}:00:00',
+            'duration_minutes': 90 + 30 * (i % 3),
+        }
+        for i in range(200)
+    ]},
+}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_requests(app, ids):
+    """One (label, method, path, body) per method of every route.
+
+    ``body`` holds the ``data`` or ``json`` arguments for the test client.
+    Reads (including searches) come first so they see only the seeded data;
+    writes run last.
+    """
+    reads, writes = [], []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda rule: rule.rule):
+        if rule.endpoint == 'static':
+            continue
+        if any(name not in ids for name in rule.arguments):
+            continue
+        path = rule.build({name: ids[name] for name in rule.arguments}, append_unknown=False)[1]
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            if rule.endpoint in JSON_DATA:
+                body = {'json': JSON_DATA[rule.endpoint](ids)}
+            elif rule.endpoint in FORM_DATA:
+                body = {'data': FORM_DATA[rule.endpoint](ids)}
+            else:
+                body = {}
+            request = (f'{method} {rule.rule}', method, path, body)
+            if method == 'GET' or rule.endpoint.startswith('main.search_') or rule.endpoint in JSON_DATA:
+                reads.append(request)
+            else:
+                writes.append(request)
+    return reads + writes
+
+
+def decoded_size(response):
+    data = response.get_data()
+    encoding = response.headers.get('Content-Encoding')
+    if encoding == 'gzip':
+        return len(gzip.decompress(data))
+    if encoding == 'br':
+        import brotli
+        return len(brotli.decompress(data))
+    return len(data)
+
+
+def timed_request(client, method, path, body, encoding):
+    started, cpu_started = time.perf_counter(), time.process_time()
+    response = client.open(path, method=method, headers={'Accept-Encoding': encoding}, **body)
+    wire_bytes = len(response.get_data())
+    wall = (time.perf_counter() - started) * 1000
+    cpu = (time.process_time() - cpu_started) * 1000
+    return response, wire_bytes, wall, cpu
+
+
+def measure(client, counter, method, path, body, repeat, encoding='gzip'):
+    timings, cpu_times, identity_cpu_times = [], [], []
+    for _ in range(repeat):
+        counter['queries'] = 0
+        response, wire_bytes, wall, cpu = timed_request(client, method, path, body, encoding)
+        timings.append(wall)
+        cpu_times.append(cpu)
+        queries = counter['queries']
+        if encoding != 'identity':
+            identity_cpu_times.append(timed_request(client, method, path, body, 'identity')[3])
+
+    tracemalloc.start()
+    client.open(path, method=method, headers={'Accept-Encoding': encoding}, **body).get_data()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    cpu_ms = statistics.median(cpu_times)
+    identity_cpu_ms = statistics.median(identity_cpu_times) if identity_cpu_times else cpu_ms
+    return {
+        'status': response.status_code,
+        'bytes': decoded_size(response),
+        'wire_bytes': wire_bytes,
+        'encoding': response.headers.get('Content-Encoding', 'identity'),
+        'queries': queries,
+        'latency_ms': {
+            'min': round(timings[0], 3),
+            'median': round(statistics.median(timings), 3),
+            'p95': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            'max': round(timings[-1], 3),
+        },
+        'cpu_ms': round(cpu_ms, 3),
+        'compression_cpu_ms': round(max(cpu_ms - identity_cpu_ms, 0.0), 3),
+        'peak_memory_kb': round(peak / 1024, 1),
+    }
+
+
+def compare(previous, current):
+    print(f"\n{'route':<40} {'median ms':>21} {'queries':>13} {'wire bytes':>21}")
+    for label, result in current['routes'].items():
+        before = previous['routes'].get(label)
+        if before is None:
+            continue
+        old, new = before['latency_ms']['median'], result['latency_ms']['median']
+        change = (new - old) / old * 100 if old else 0.0
+        # Results from before wire_bytes was recorded only have the body size.
+        old_wire = before.get('wire_bytes', before['bytes'])
+        print(f"{label:<40} {old:>8.2f} -> {new:>8.2f} {change:>+5.0f}% "
+              f"{before['queries']:>5} -> {result['queries']:<5} "
+              f"{old_wire:>9} -> {result['wire_bytes']:<9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark every route in app.py.')
+    parser.add_argument('--shows', type=int, default=1000, help='1k to 1M')
+    parser.add_argument('--venues', type=int)
+    parser.add_argument('--artists', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--database-url',
+                        help='database to seed; defaults to a throwaway SQLite file. '
+                             'Postgres databases must already be migrated and empty.')
+    parser.add_argument('--cache', action='store_true', help='leave the response cache on')
+    parser.add_argument('--encoding', default='gzip',
+                        help="Accept-Encoding to send: gzip, br or identity")
+    parser.add_argument('--output', default='bench.json')
+    parser.add_argument('--compare', help='earlier results file to diff against')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='fyyur-bench-')
+    database_url = args.database_url or f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # config.py reads the environment at import time.
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['RESPONSE_CACHE_ENABLED'] = '1' if args.cache else '0'
+    os.environ.setdefault('REQUEST_LOG_PATH', '')
+
+    from sqlalchemy import event
+    from app import create_app
+    from models import db, Venue, Artist
+    from benchmarks.generator import generate
+    from benchmarks.startup import measure_startup
+
+    app = create_app()
+    # Record failing routes as 500s instead of aborting the run.
+    app.config['PROPAGATE_EXCEPTIONS'] = False
+    counter = {'queries': 0}
+
+    def count_query(*_):
+        counter['queries'] += 1
+
+    with app.app_context():
+        if database_url.startswith('sqlite'):
+            db.create_all()
+        started = time.perf_counter()
+        counts = generate(args.shows, args.venues, args.artists, args.seed)
+        seed_seconds = time.perf_counter() - started
+        venue = db.session.query(Venue.id, Venue.state, Venue.city).order_by(Venue.id).first()
+        ids = {
+            'venue_id': venue.id,
+            'artist_id': db.session.query(Artist.id).order_by(Artist.id).limit(1).scalar(),
+            'state': venue.state,
+            'city': venue.city,
+        }
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+
+    # Before the write routes run, so every process sees the same data.
+    startup = measure_startup(['/', '/venues', f"/venues/{ids['venue_id']}", '/artists', '/shows'])
+    for scenario, result in startup.items():
+        first = ', '.join(f'{path} {ms:.1f}' for path, ms in result['first_request_ms'].items())
+        print(f"{scenario:<32} import {result['import_ms']:>6.1f} ms, create_app {result['create_ms']:>6.1f} ms "
+              f"(warm-up {result['warmup_ms']:.1f} ms); first requests: {first}")
+
+    client = app.test_client()
+    routes = {}
+    for label, method, path, body in build_requests(app, ids):
+        routes[label] = measure(client, counter, method, path, body, args.repeat, args.encoding)
+        result = routes[label]
+        print(f"{label:<40} {result['status']:>4} {result['latency_ms']['median']:>9.2f} ms "
+              f"{result['queries']:>4} queries {result['peak_memory_kb']:>10.1f} KiB "
+              f"{result['bytes']:>9} -> {result['wire_bytes']:>8} B "
+              f"(+{result['compression_cpu_ms']:.2f} ms CPU)")
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'database': database_url.split(':', 1)[0],
+            'scale': counts,
+            'seed': args.seed,
+            'seed_seconds': round(seed_seconds, 2),
+            'repeat': args.repeat,
+            'cache': args.cache,
+            'encoding': args.encoding,
+        },
+        'startup': startup,
+        'routes': routes,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\nWrote {args.output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Startup and first-request latency of a fresh worker process.
+
+Each scenario runs in a new interpreter, the way a worker starts after a
+deploy or a recycle: it times importing app.py, then ``create_app()``
+(including the template warm-up), then one request to each path. ``benchmarks.run`` calls
+``measure_startup`` with the database it seeded; on its own:
+
+    DATABASE_URL=sqlite:///bench.db python -m benchmarks.startup / /venues
+"""
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# name -> environment overrides; the cache directory is filled in per run.
+SCENARIOS = (
+    ('no bytecode cache, no warm-up', {'TEMPLATE_CACHE_DIR': '', 'TEMPLATE_WARMUP': '0'}),
+    ('cold bytecode cache, warm-up', {'TEMPLATE_WARMUP': '1'}),
+    ('warm bytecode cache, warm-up', {'TEMPLATE_WARMUP': '1'}),
+)
+
+
+def measure_startup(paths, env=None):
+    """Run every scenario in a subprocess; returns {scenario: timings}."""
+    cache_dir = tempfile.mkdtemp(prefix='fyyur-jinja-')
+    results = {}
+    try:
+        for name, overrides in SCENARIOS:
+            child_env = dict(os.environ if env is None else env)
+            child_env.update({'TEMPLATE_CACHE_DIR': cache_dir, **overrides})
+            output = subprocess.check_output(
+                [sys.executable, '-m', 'benchmarks.startup', *paths], env=child_env, text=True
+            )
+            results[name] = json.loads(output.splitlines()[-1])
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    return results
+
+
+def main():
+    started = time.perf_counter()
+    from app import create_app
+    import_ms = (time.perf_counter() - started) * 1000
+    started = time.perf_counter()
+    app = create_app()
+    create_ms = (time.perf_counter() - started) * 1000
+    warmup = app.extensions.get('template_warmup', {})
+
+    client = app.test_client()
+    first_request_ms = {}
+    for path in sys.argv[1:] or ['/']:
+        started = time.perf_counter()
+        client.get(path).get_data()
+        first_request_ms[path] = round((time.perf_counter() - started) * 1000, 3)
+
+    print(json.dumps({
+        'import_ms': round(import_ms, 3),
+        'create_ms': round(create_ms, 3),
+        'warmup_ms': round(warmup.get('seconds', 0) * 1000, 3),
+        'templates': warmup.get('templates', 0),
+        'first_request_ms': first_request_ms,
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from flask import current_app, g, make_response, request, session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from models import Venue, Artist, Show
+
+
+class ResponseCache:
+    """In-process LRU cache of rendered responses with a per-entry TTL.
+
+    Entries carry tags such as ``venue:3`` or ``venues``; committing a
+    change to a Venue, Artist or Show row drops exactly the entries tagged
+    with it (see ``tags_for``). The cache is per worker process, so other
+    workers only see a change once their copy expires.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.enabled = True
+        self._entries = OrderedDict()
+        self._keys_by_tag = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_entries = app.config['RESPONSE_CACHE_MAX_ENTRIES']
+        self.ttl = app.config['RESPONSE_CACHE_TTL']
+        self.enabled = app.config['RESPONSE_CACHE_ENABLED']
+        app.extensions['response_cache'] = self
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value, _ = entry
+            if expires < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, tags=()):
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, frozenset(tags))
+            for tag in tags:
+                self._keys_by_tag[tag].add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._keys_by_tag.get(tag, ())):
+                    self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_tag.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _discard(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+
+response_cache = ResponseCache()
+
+
+def cache_tags(*tags):
+    """Tag the response being rendered so later commits can invalidate it."""
+    if 'cache_tags' in g:
+        g.cache_tags.update(tags)
+
+
+def cached(view):
+    """Serve a GET view from ``response_cache``, keyed by endpoint and arguments.
+
+    Requests with pending flash messages bypass the cache in both
+    directions, as their page is specific to one session.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not response_cache.enabled or request.method != 'GET' or session.get('_flashes'):
+            return view(*args, **kwargs)
+
+        key = (
+            request.endpoint,
+            tuple(sorted((request.view_args or {}).items())),
+            request.query_string
+        )
+        hit = response_cache.get(key)
+        if hit is not None:
+            body, status, headers = hit
+            return current_app.response_class(body, status=status, headers=headers)
+
+        g.cache_tags = set()
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and not response.is_streamed and 'Set-Cookie' not in response.headers:
+            response_cache.set(
+                key,
+                (response.get_data(), response.status_code, list(response.headers.items())),
+                g.cache_tags
+            )
+        return response
+
+    return wrapper
+
+
+def tags_for(obj):
+    """Cache tags affected by a change to ``obj``, including previous foreign keys."""
+    if isinstance(obj, Venue):
+        return {f'venue:{obj.id}', 'venues'}
+    if isinstance(obj, Artist):
+        return {f'artist:{obj.id}'}
+    if isinstance(obj, Show):
+        state = inspect(obj)
+        tags = {'venues'}
+        for attr, prefix in (('venue_id', 'venue'), ('artist_id', 'artist')):
+            history = state.attrs[attr].history
+            for value in (*history.unchanged, *history.added, *history.deleted):
+                if value is not None:
+                    tags.add(f'{prefix}:{value}')
+        return tags
+    return set()
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_tags(session, flush_context):
+    tags = session.info.setdefault('cache_tags', set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        tags.update(tags_for(obj))
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    tags = session.info.pop('cache_tags', None)
+    if tags:
+        response_cache.invalidate(tags)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_rolled_back(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('cache_tags', None)
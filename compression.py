@@ -0,0 +1,167 @@
+"""gzip/brotli compression of HTML, JSON and other text responses.
+
+A WSGI middleware around ``app.wsgi_app``. The encoding is picked from
+Accept-Encoding: brotli when the optional brotli package is installed
+and the client takes it, otherwise gzip. Responses are left alone when
+they are small, already encoded, partial, marked ``no-transform``, or not
+a compressible type.
+
+Streamed responses (no Content-Length, e.g. the /api endpoints) are
+compressed as they are produced, flushed every FLUSH_SIZE bytes of input
+so clients keep receiving data without one flush per tiny chunk.
+"""
+import zlib
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/html',
+    'text/css',
+    'text/plain',
+    'text/javascript',
+    'application/javascript',
+    'application/json',
+    'application/x-ndjson',
+)
+FLUSH_SIZE = 16 * 1024
+
+
+class GzipStream:
+    def __init__(self, level):
+        # wbits=31 writes a gzip header and trailer around the deflate stream.
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data, flush=False):
+        out = self._compressor.compress(data)
+        if flush:
+            out += self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        return out
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data, flush=False):
+        out = self._compressor.process(data)
+        if flush:
+            out += self._compressor.flush()
+        return out
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """Compress responses from ``app`` for clients that accept it."""
+
+    def __init__(self, app, level=6, brotli_quality=4, min_size=500):
+        self.app = app
+        self.level = level
+        self.brotli_quality = brotli_quality
+        self.min_size = min_size
+
+    def negotiate(self, environ):
+        accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        if brotli is not None and accept['br']:
+            return 'br'
+        if accept['gzip']:
+            return 'gzip'
+        return None
+
+    def should_compress(self, status, headers):
+        code = int(status.split(' ', 1)[0])
+        if code < 200 or code in (204, 206, 304):
+            return False
+        if 'content-encoding' in headers or 'content-range' in headers:
+            return False
+        if 'no-transform' in headers.get('cache-control', ''):
+            return False
+        content_type = headers.get('content-type', '').split(';', 1)[0].strip()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return False
+        length = headers.get('content-length')
+        return length is None or int(length) >= self.min_size
+
+    def __call__(self, environ, start_response):
+        encoding = self.negotiate(environ)
+        if encoding is None or environ['REQUEST_METHOD'] == 'HEAD':
+            return self.app(environ, start_response)
+
+        state = {}
+
+        def compressing_start_response(status, headers, exc_info=None):
+            lowered = {name.lower(): value for name, value in headers}
+            state['compress'] = self.should_compress(status, lowered)
+            # Without a length the body is streamed and flushed as it goes.
+            state['streamed'] = 'content-length' not in lowered
+            if state['compress']:
+                headers = [(name, value) for name, value in headers
+                           if name.lower() not in ('content-length', 'vary')]
+                headers.append(('Content-Encoding', encoding))
+                vary = [v.strip() for v in lowered.get('vary', '').split(',') if v.strip()]
+                if 'accept-encoding' not in (v.lower() for v in vary):
+                    vary.append('Accept-Encoding')
+                headers.append(('Vary', ', '.join(vary)))
+                headers = [(name, weaken_etag(value) if name.lower() == 'etag' else value)
+                           for name, value in headers]
+            return start_response(status, headers, exc_info)
+
+        body = self.app(environ, compressing_start_response)
+        if state.get('compress') is False:
+            # Hand back untouched bodies as-is, keeping wsgi.file_wrapper.
+            return body
+        return self._iterate(body, state, encoding)
+
+    def _stream(self, encoding):
+        if encoding == 'br':
+            return BrotliStream(self.brotli_quality)
+        return GzipStream(self.level)
+
+    def _iterate(self, body, state, encoding):
+        stream = None
+        pending = 0
+        try:
+            for chunk in body:
+                # start_response has run by the time the first chunk exists.
+                if not state.get('compress'):
+                    yield chunk
+                    continue
+                if stream is None:
+                    stream = self._stream(encoding)
+                pending += len(chunk)
+                flush = state['streamed'] and pending >= FLUSH_SIZE
+                if flush:
+                    pending = 0
+                data = stream.compress(chunk, flush)
+                if data:
+                    yield data
+            if state.get('compress'):
+                if stream is None:
+                    stream = self._stream(encoding)
+                yield stream.finish()
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+
+def weaken_etag(value):
+    """The compressed bytes differ, so a strong ETag no longer applies to them."""
+    return value if value.startswith('W/') else f'W/{value}'
+
+
+def init_compression(app):
+    if app.config['COMPRESSION_ENABLED']:
+        app.wsgi_app = CompressionMiddleware(
+            app.wsgi_app,
+            level=app.config['COMPRESSION_LEVEL'],
+            brotli_quality=app.config['COMPRESSION_BROTLI_QUALITY'],
+            min_size=app.config['COMPRESSION_MIN_SIZE'],
+        )
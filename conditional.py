@@ -0,0 +1,158 @@
+"""Conditional GET (ETag / Last-Modified) for listing and detail pages.
+
+Each page gets a validator: a cheap query over the ``updated_at`` columns
+of the rows it renders that returns when the page last changed. Requests
+whose If-None-Match or If-Modified-Since still match get a 304 without
+running the view. Responses are marked ``public`` so an edge cache can keep
+them and revalidate with those same cheap requests.
+
+Removing a show leaves no row behind to carry a timestamp, so every show
+insert, update or delete flushed by the ORM also touches its venue and
+artist; the bulk importer does the same for its batches.
+"""
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from flask import current_app, make_response, request, session
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from werkzeug.http import is_resource_modified
+from counters import affected_ids
+from models import db, utcnow, Venue, Artist, Show
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def last_changed(updated, started=()):
+    """Latest of naive-UTC ``updated`` times and naive-local show ``started`` times.
+
+    A show starting moves it from upcoming to past on the detail pages, so
+    it counts as a change at its start time.
+    """
+    times = [value.replace(tzinfo=timezone.utc) for value in updated if value is not None]
+    times += [value.astimezone(timezone.utc) for value in started if value is not None]
+    return max(times, default=datetime(1970, 1, 1, tzinfo=timezone.utc))
+
+
+def venue_validator(venue_id):
+    now = datetime.now()
+    artists = select(func.max(Artist.updated_at)) \
+        .join(Show, Show.artist_id == Artist.id) \
+        .where(Show.venue_id == Venue.id) \
+        .scalar_subquery()
+    started = select(func.max(Show.start_time)) \
+        .where(Show.venue_id == Venue.id, Show.start_time < now) \
+        .scalar_subquery()
+    row = db.session.execute(
+        select(Venue.updated_at, artists, started).where(Venue.id == venue_id)
+    ).first()
+    if row is None:
+        return None
+    return last_changed(row[:2], row[2:]), ()
+
+
+def artist_validator(artist_id):
+    now = datetime.now()
+    venues = select(func.max(Venue.updated_at)) \
+        .join(Show, Show.venue_id == Venue.id) \
+        .where(Show.artist_id == Artist.id) \
+        .scalar_subquery()
+    started = select(func.max(Show.start_time)) \
+        .where(Show.artist_id == Artist.id, Show.start_time <= now) \
+        .scalar_subquery()
+    row = db.session.execute(
+        select(Artist.updated_at, venues, started).where(Artist.id == artist_id)
+    ).first()
+    if row is None:
+        return None
+    return last_changed(row[:2], row[2:]), ()
+
+
+def listing_validator(model):
+    """Validator for a listing of ``model`` rows.
+
+    The row count goes into the ETag so deleted rows are noticed too.
+    """
+    def validator(**view_args):
+        updated, count = db.session.execute(
+            select(func.max(model.updated_at), func.count(model.id))
+        ).one()
+        return last_changed([updated]), (count,)
+    return validator
+
+
+def shows_validator():
+    # Deleting a show touches its venue and artist, so no count is needed.
+    row = db.session.execute(
+        select(
+            select(func.max(Show.updated_at)).scalar_subquery(),
+            select(func.max(Venue.updated_at)).scalar_subquery(),
+            select(func.max(Artist.updated_at)).scalar_subquery(),
+        )
+    ).one()
+    return last_changed(row), ()
+
+
+def make_etag(last_modified, extra):
+    key = f'{last_modified.isoformat()}|{extra!r}'
+    return hashlib.sha1(key.encode()).hexdigest()[:20]
+
+
+def conditional(validator):
+    """Answer conditional GETs for a view from ``validator(**view_args)``.
+
+    ``validator`` returns ``(last_modified, extra)``, where ``extra`` is
+    anything else the ETag should depend on, or None to let the view
+    handle a missing row.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            # Pages with pending flash messages are specific to one session.
+            if request.method not in READ_METHODS or session.get('_flashes'):
+                return view(**kwargs)
+            validated = validator(**kwargs)
+            if validated is None:
+                return view(**kwargs)
+            last_modified, extra = validated
+            etag = make_etag(last_modified, extra)
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+                return _add_validators(response, etag, last_modified)
+
+            response = make_response(view(**kwargs))
+            if response.status_code == 200:
+                _add_validators(response, etag, last_modified)
+            return response
+        return wrapper
+    return decorator
+
+
+def _add_validators(response, etag, last_modified):
+    # Weak, since the ETag describes the data rather than exact bytes.
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.public = True
+    max_age = current_app.config['CONDITIONAL_MAX_AGE']
+    if max_age:
+        response.cache_control.max_age = max_age
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def touch_show_owners(connection, venue_ids=(), artist_ids=()):
+    """Bump ``updated_at`` on venues and artists whose shows changed."""
+    now = utcnow()
+    for model, ids in ((Venue, venue_ids), (Artist, artist_ids)):
+        ids = {id for id in ids if id is not None}
+        if ids:
+            connection.execute(model.__table__.update().where(model.id.in_(ids)).values(updated_at=now))
+
+
+@event.listens_for(Session, 'after_flush')
+def _touch_flushed(session, flush_context):
+    ids = affected_ids(session)
+    if any(ids.values()):
+        touch_show_owners(session.connection(), ids['venue_id'], ids['artist_id'])
@@ -0,0 +1,176 @@
+"""Maintained upcoming/past show counts per venue and artist.
+
+Listings read ``venue_show_count`` and ``artist_show_count`` instead of
+counting shows on every request. Rows are recomputed for just the venues
+and artists touched by a flush (or by a bulk import batch), in the same
+transaction as the change. The parent venue and artist rows are locked
+first, so two transactions adding shows for the same venue take turns and
+the second one counts the first one's show. Rows are written with
+``INSERT ... ON CONFLICT DO UPDATE``.
+
+Time also moves shows from upcoming to past. Each row keeps the start time
+of its next upcoming show, and ``flask show-counts roll`` recomputes the
+rows whose next show has started; run it from cron, or keep it running
+with ``--interval``:
+
+    flask show-counts roll --interval 60
+"""
+import time
+from datetime import datetime
+import click
+from sqlalchemy import case, delete, event, exists, func, inspect, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import db, Venue, Artist, Show, VenueShowCount, ArtistShowCount
+
+# Show foreign key -> counter table keyed by it
+COUNTERS = {
+    'venue_id': VenueShowCount,
+    'artist_id': ArtistShowCount,
+}
+PARENTS = {
+    'venue_id': Venue,
+    'artist_id': Artist,
+}
+INSERTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+CHUNK_SIZE = 1000
+
+
+def _counts_query(key, now):
+    show_key = getattr(Show, key)
+    upcoming = Show.start_time > now
+    return select(
+        show_key,
+        func.sum(case((upcoming, 1), else_=0)),
+        func.sum(case((upcoming, 0), else_=1)),
+        func.min(case((upcoming, Show.start_time))),
+    ).group_by(show_key)
+
+
+def _write_counts(connection, key, counts, ids=None):
+    """Upsert the rows of ``counts`` and drop rows whose venue or artist has no shows.
+
+    ``ids`` limits the dropping to those ids; ``None`` checks every row.
+    """
+    model = COUNTERS[key]
+    model_key = getattr(model, key)
+    stmt = INSERTS[connection.dialect.name](model).from_select(
+        [key, 'upcoming', 'past', 'next_show_at'], counts
+    )
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={name: stmt.excluded[name] for name in ('upcoming', 'past', 'next_show_at')},
+    ))
+    stale = delete(model).where(~exists().where(getattr(Show, key) == model_key))
+    if ids is not None:
+        stale = stale.where(model_key.in_(ids))
+    connection.execute(stale)
+
+
+def _refresh(connection, key, ids, now):
+    parent = PARENTS[key]
+    ids = sorted(ids)
+    for start in range(0, len(ids), CHUNK_SIZE):
+        chunk = ids[start:start + CHUNK_SIZE]
+        # FOR NO KEY UPDATE (ignored on SQLite, which has one writer) makes
+        # concurrent refreshes of a venue wait for each other without
+        # blocking the key-share locks taken by inserting its shows.
+        connection.execute(
+            select(parent.id).where(parent.id.in_(chunk)).order_by(parent.id)
+            .with_for_update(key_share=True)
+        )
+        counts = _counts_query(key, now).where(getattr(Show, key).in_(chunk))
+        _write_counts(connection, key, counts, chunk)
+
+
+def refresh_counts(connection, venue_ids=(), artist_ids=(), now=None):
+    """Recompute the counter rows for the given venues and artists."""
+    now = now or datetime.now()
+    for key, ids in (('venue_id', venue_ids), ('artist_id', artist_ids)):
+        ids = {id for id in ids if id is not None}
+        if ids:
+            _refresh(connection, key, ids, now)
+
+
+def rebuild_counts(connection, now=None):
+    """Recompute every counter row from the show table."""
+    now = now or datetime.now()
+    for key in COUNTERS:
+        _write_counts(connection, key, _counts_query(key, now))
+
+
+def roll_counts(connection, now=None):
+    """Recompute rows whose next upcoming show has started; returns how many."""
+    now = now or datetime.now()
+    rolled = 0
+    for key, model in COUNTERS.items():
+        ids = connection.execute(
+            select(getattr(model, key)).where(model.next_show_at <= now)
+        ).scalars().all()
+        _refresh(connection, key, ids, now)
+        rolled += len(ids)
+    return rolled
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+# Load a show's current venue and artist before they are reassigned, so an
+# expired (just committed) show still reports the ones it moved away from.
+for _key in COUNTERS:
+    event.listen(getattr(Show, _key), 'set', _keep_old_value, active_history=True, retval=True)
+
+
+def affected_ids(session):
+    """Venue and artist ids whose shows changed, or that were deleted, in this flush."""
+    ids = {key: set() for key in COUNTERS}
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Show):
+            state = inspect(obj)
+            for key in COUNTERS:
+                history = state.attrs[key].history
+                ids[key].update(history.unchanged, history.added, history.deleted)
+                ids[key].add(state.dict.get(key))
+        elif isinstance(obj, Venue) and obj in session.deleted:
+            ids['venue_id'].add(obj.id)
+        elif isinstance(obj, Artist) and obj in session.deleted:
+            ids['artist_id'].add(obj.id)
+    return ids
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_flushed(session, flush_context):
+    ids = affected_ids(session)
+    if any(ids.values()):
+        refresh_counts(session.connection(), ids['venue_id'], ids['artist_id'])
+
+
+@click.group('show-counts')
+def show_counts_command():
+    """Maintain the upcoming/past show counters."""
+
+
+@show_counts_command.command('rebuild')
+def rebuild():
+    """Recompute all counters from scratch."""
+    with db.engine.begin() as connection:
+        rebuild_counts(connection)
+    click.echo('Show counters rebuilt.')
+
+
+@show_counts_command.command('roll')
+@click.option('--interval', type=int, default=0,
+              help='Keep running, rolling every INTERVAL seconds.')
+def roll(interval):
+    """Move shows that have started from upcoming to past."""
+    while True:
+        with db.engine.begin() as connection:
+            rolled = roll_counts(connection)
+        click.echo(f'{datetime.now():%Y-%m-%d %H:%M:%S} rolled {rolled} counters')
+        if not interval:
+            break
+        time.sleep(interval)
@@ -0,0 +1,202 @@
+import csv
+import gzip
+import json
+import os
+import time
+from datetime import date, datetime, timedelta, timezone
+import click
+from flask import current_app
+from sqlalchemy import func, select, tuple_
+from models import db, Venue, Artist, Show
+
+TABLES = {
+    'venue': Venue,
+    'artist': Artist,
+    'show': Show,
+}
+STATE_FILE = '.export-state.json'
+LIST_SEPARATOR = ';'
+
+
+def load_state(out_dir):
+    path = os.path.join(out_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(out_dir, state):
+    path = os.path.join(out_dir, STATE_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _csv_value(value):
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat(sep=' ') if isinstance(value, datetime) else value.isoformat()
+    return value
+
+
+class CSVWriter:
+    extension = 'csv.gz'
+
+    def __init__(self, path, columns):
+        self.file = gzip.open(path, 'wt', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([column.name for column in columns])
+
+    def write(self, rows):
+        self.writer.writerows([_csv_value(value) for value in row] for row in rows)
+
+    def close(self):
+        self.file.close()
+
+
+class JSONLWriter:
+    extension = 'jsonl.gz'
+
+    def __init__(self, path, columns):
+        self.file = gzip.open(path, 'wt', encoding='utf-8')
+        self.columns = [column.name for column in columns]
+
+    def write(self, rows):
+        for row in rows:
+            self.file.write(json.dumps(dict(zip(self.columns, row)), default=_json_default) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Columnar output; each fetched batch becomes one row group."""
+
+    extension = 'parquet'
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise click.ClickException('Parquet export needs pyarrow: pip install pyarrow')
+        self.pa = pyarrow
+        self.columns = [column.name for column in columns]
+        # An explicit schema keeps all-NULL batches from changing column types.
+        self.schema = pyarrow.schema([(column.name, self._arrow_type(column)) for column in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression='zstd')
+
+    def _arrow_type(self, column):
+        pa = self.pa
+        python_type = list if column.name == 'genres' else column.type.python_type
+        return {
+            int: pa.int64(),
+            str: pa.string(),
+            bool: pa.bool_(),
+            datetime: pa.timestamp('us'),
+            list: pa.list_(pa.string()),
+        }[python_type]
+
+    def write(self, rows):
+        data = [dict(zip(self.columns, row)) for row in rows]
+        self.writer.write_table(self.pa.Table.from_pylist(data, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {
+    'csv': CSVWriter,
+    'jsonl': JSONLWriter,
+    'parquet': ParquetWriter,
+}
+
+
+def database_now():
+    """The database server's clock as naive UTC, like the updated_at columns."""
+    now = db.session.scalar(select(func.now()))
+    if now.tzinfo is not None:
+        now = now.astimezone(timezone.utc).replace(tzinfo=None)
+    return now
+
+
+def export_table(name, fmt, out_dir, batch_size, since=None, stamp=None, until=None):
+    """Stream one table to ``out_dir``; returns ``(path, rows, high_water)``.
+
+    Rows come out in ``(updated_at, id)`` order. ``since`` is the previous
+    run's high-water mark, a ``(updated_at, id)`` pair; only rows changed
+    after it are exported. ``until`` leaves out rows stamped at or after
+    it; they are exported by a later run.
+    """
+    table = TABLES[name].__table__
+    stmt = select(*table.columns).order_by(table.c.updated_at, table.c.id)
+    if since is not None:
+        stmt = stmt.where(tuple_(table.c.updated_at, table.c.id) > tuple_(*since))
+    if until is not None:
+        stmt = stmt.where(table.c.updated_at < until)
+
+    writer_class = WRITERS[fmt]
+    path = os.path.join(out_dir, f'{name}-{stamp}.{writer_class.extension}')
+    writer = writer_class(path, list(table.columns))
+    count, high_water = 0, since
+    try:
+        result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+        for rows in result.partitions():
+            writer.write(rows)
+            count += len(rows)
+            high_water = (rows[-1].updated_at, rows[-1].id)
+    finally:
+        writer.close()
+    return path, count, high_water
+
+
+@click.command('export')
+@click.option('--table', 'tables', type=click.Choice(['all', *TABLES]), default='all', show_default=True)
+@click.option('--format', 'fmt', type=click.Choice(list(WRITERS)), default='csv', show_default=True)
+@click.option('--out', 'out_dir', type=click.Path(file_okay=False), default='exports', show_default=True)
+@click.option('--batch-size', default=10000, show_default=True)
+@click.option('--incremental', is_flag=True,
+              help='Only export rows added or changed since the last snapshot in --out.')
+def export_command(tables, fmt, out_dir, batch_size, incremental):
+    """Snapshot venue, artist and show tables to compressed files.
+
+    Rows are read through a server-side cursor in --batch-size chunks and
+    written straight out, so memory use does not grow with table size.
+    Incremental snapshots follow each table's updated_at column; deleted
+    rows are not reported. updated_at is stamped when a row is flushed,
+    not when it commits, so a row can commit after a later stamp has been
+    exported. Each run therefore stops EXPORT_OVERLAP_SECONDS before the
+    database's current time, and rows stamped since then go in the next
+    snapshot, by which point their transactions have finished.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    until = database_now() - timedelta(seconds=current_app.config['EXPORT_OVERLAP_SECONDS'])
+    names = list(TABLES) if tables == 'all' else [tables]
+    state = load_state(out_dir)
+    stamp = datetime.now().strftime('%Y%m%dT%H%M%S')
+
+    for name in names:
+        since = None
+        previous = state.get(name, {})
+        if incremental and previous.get('updated_at'):
+            since = (datetime.fromisoformat(previous['updated_at']), previous['id'])
+        started = time.perf_counter()
+        path, count, high_water = export_table(name, fmt, out_dir, batch_size, since, stamp, until)
+        elapsed = time.perf_counter() - started
+        state[name] = {
+            'updated_at': high_water[0].isoformat() if high_water else None,
+            'id': high_water[1] if high_water else None,
+            'exported_at': stamp,
+            'path': os.path.basename(path),
+        }
+        click.echo(f'{name}: {count} rows -> {path} in {elapsed:.1f}s')
+
+    save_state(out_dir, state)
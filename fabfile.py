@@ -13,6 +13,10 @@ def test():
         abort("Aborted at user request.")
 
 
+def bench(shows=10000):
+    local("python -m benchmarks.run --shows {} --output bench.json".format(shows))
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
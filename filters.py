@@ -0,0 +1,41 @@
+from datetime import datetime, timezone
+from functools import lru_cache
+
+# Named formats as Babel patterns. Babel and dateutil are imported on first
+# use rather than at startup; results are memoized, so that happens once.
+FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+LOCALE = 'en'
+
+
+@lru_cache(maxsize=64)
+def compiled_pattern(format):
+    from babel.dates import parse_pattern
+    return parse_pattern(FORMATS.get(format, format))
+
+
+@lru_cache(maxsize=1)
+def locale():
+    from babel import Locale
+    return Locale.parse(LOCALE)
+
+
+@lru_cache(maxsize=8192)
+def format_datetime(value, format='medium'):
+    """Jinja ``datetime`` filter.
+
+    Accepts a ``datetime`` or a date string, and a named format or a Babel
+    pattern. Results are memoized, since listings repeat the same timestamps.
+    """
+    if isinstance(value, datetime):
+        date = value
+    else:
+        import dateutil.parser
+        date = dateutil.parser.parse(value)
+    # Naive values are treated as UTC, as babel.dates.format_datetime does.
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=timezone.utc)
+
+    return compiled_pattern(format).apply(date, locale())
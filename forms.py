@@ -1,8 +1,9 @@
 from datetime import datetime
 from flask_wtf import FlaskForm as Form
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, IntegerField
+from wtforms.validators import DataRequired, AnyOf, URL, NumberRange, Optional
 from enums import Genre, State
+from models import DEFAULT_SHOW_MINUTES, MAX_SHOW_MINUTES
 
 class ShowForm(Form):
     artist_id = StringField(
@@ -16,6 +17,13 @@ class ShowForm(Form):
         validators=[DataRequired()],
         default= datetime.today()
     )
+    # Left blank, a show gets the default length.
+    duration_minutes = IntegerField(
+        'duration_minutes',
+        validators=[Optional(), NumberRange(min=1, max=MAX_SHOW_MINUTES)],
+        filters=[lambda value: DEFAULT_SHOW_MINUTES if value is None else value],
+        default=DEFAULT_SHOW_MINUTES
+    )
 
 class VenueForm(Form):
     name = StringField(
@@ -0,0 +1,27 @@
+"""gunicorn settings: build the app once in the master and fork the workers.
+
+    SECRET_KEY=... gunicorn 'app:create_app()'
+
+With preload_app the master imports app.py, runs create_app() (config,
+template warm-up) and forks; workers share that memory copy-on-write.
+Connection pools and the log writer thread are re-created in each worker
+(see pooling.init_fork_safety and app_logging.init_logging). Each worker
+logs to its own LOG_FILE, named with its pid, unless LOG_ROTATION=external
+and logrotate rotates the shared one.
+"""
+import os
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+preload_app = True
+
+
+def on_starting(server):
+    # The app imports these on first use to keep CLI commands quick to
+    # start; in the master they are loaded once for every worker instead.
+    import forms
+    import dateutil.parser
+    from filters import FORMATS, compiled_pattern, locale
+    for format in FORMATS:
+        compiled_pattern(format)
+    locale()
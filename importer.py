@@ -0,0 +1,256 @@
+import csv
+import gzip
+import io
+import json
+import time
+from functools import lru_cache
+import click
+from sqlalchemy import insert
+from werkzeug.datastructures import MultiDict
+from models import db, Venue, Artist, Show
+from counters import refresh_counts
+from conditional import touch_show_owners
+from scheduling import double_booked
+
+FALSE_VALUES = ('', '0', 'false', 'f', 'no', 'n')
+LIST_SEPARATOR = ';'
+
+# form field -> model column, per importable kind. Forms are named rather
+# than imported so that loading the CLI doesn't import WTForms.
+KINDS = {
+    'venues': {
+        'model': Venue,
+        'form': 'VenueForm',
+        'columns': {
+            'name': 'name', 'city': 'city', 'state': 'state', 'address': 'address',
+            'phone': 'phone', 'image_link': 'image_link', 'genres': 'genres',
+            'facebook_link': 'facebook_link', 'website_link': 'website_link',
+            'seeking_talent': 'seeking_talent', 'seeking_description': 'seeking_description',
+        },
+    },
+    'artists': {
+        'model': Artist,
+        'form': 'ArtistForm',
+        'columns': {
+            'name': 'name', 'city': 'city', 'state': 'state', 'phone': 'phone',
+            'image_link': 'image_link', 'genres': 'genres', 'facebook_link': 'facebook_link',
+            'website_link': 'website', 'seeking_venue': 'seeking_venue',
+            'seeking_description': 'seeking_description',
+        },
+    },
+    'shows': {
+        'model': Show,
+        'form': 'ShowForm',
+        'columns': {
+            'venue_id': 'venue_id', 'artist_id': 'artist_id', 'start_time': 'start_time',
+            'duration_minutes': 'duration_minutes',
+        },
+    },
+}
+
+
+def open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', newline='', encoding='utf-8')
+    return open(path, newline='', encoding='utf-8')
+
+
+def read_rows(path, fmt):
+    """Yield ``(line_number, row, errors)`` from a CSV or JSONL file without loading it.
+
+    ``errors`` is None for a row that parsed into a dict; otherwise ``row``
+    is what was read, to be rejected rather than imported.
+    """
+    with open_text(path) as f:
+        if fmt == 'csv':
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row, None
+        else:
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield number, line.rstrip('\n'), {'line': [f'not valid JSON: {e}']}
+                    continue
+                if isinstance(row, dict):
+                    yield number, row, None
+                else:
+                    yield number, row, {'line': ['must be a JSON object']}
+
+
+@lru_cache(maxsize=None)
+def bound_form(form_name):
+    """One reusable instance of a form in forms.py; rows are validated by re-processing it."""
+    import forms
+    return getattr(forms, form_name)(formdata=None, meta={'csrf': False})
+
+
+@lru_cache(maxsize=None)
+def field_types(form_name):
+    """``{field name: field class name}`` for a form."""
+    return {name: type(field).__name__ for name, field in bound_form(form_name)._fields.items()}
+
+
+def to_formdata(row, form_name):
+    """MultiDict in the shape a browser would post for ``form_name``."""
+    data = MultiDict()
+    for name, kind in field_types(form_name).items():
+        value = row.get(name)
+        if value is None:
+            continue
+        if kind == 'SelectMultipleField':
+            values = value if isinstance(value, list) else [v.strip() for v in str(value).split(LIST_SEPARATOR)]
+            for item in values:
+                if item:
+                    data.add(name, item)
+        elif kind == 'BooleanField':
+            if value is True or str(value).strip().lower() not in FALSE_VALUES:
+                data.add(name, 'y')
+        elif kind == 'DateTimeField':
+            data.add(name, str(value).replace('T', ' '))
+        else:
+            data.add(name, str(value))
+    return data
+
+
+def validate(row, spec):
+    """Return ``(values, errors)`` for one input row."""
+    form = bound_form(spec['form'])
+    form.process(formdata=to_formdata(row, spec['form']))
+    if not form.validate():
+        return None, form.errors
+    values = {column: form[field].data for field, column in spec['columns'].items()}
+    if spec['model'] is Show:
+        try:
+            values['venue_id'] = int(values['venue_id'])
+            values['artist_id'] = int(values['artist_id'])
+        except (TypeError, ValueError):
+            return None, {'venue_id/artist_id': ['must be integers']}
+    return values, None
+
+
+def missing_references(batch):
+    """Positions in a batch of shows whose venue or artist doesn't exist."""
+    venue_ids = {values['venue_id'] for values in batch}
+    artist_ids = {values['artist_id'] for values in batch}
+    known_venues = {row[0] for row in db.session.query(Venue.id).filter(Venue.id.in_(venue_ids))}
+    known_artists = {row[0] for row in db.session.query(Artist.id).filter(Artist.id.in_(artist_ids))}
+    return {
+        i for i, values in enumerate(batch)
+        if values['venue_id'] not in known_venues or values['artist_id'] not in known_artists
+    }
+
+
+def copy_shows(batch):
+    """Load a batch of shows with Postgres COPY on the session's connection."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for values in batch:
+        writer.writerow((values['venue_id'], values['artist_id'], values['start_time'].isoformat(sep=' '),
+                         values['duration_minutes']))
+    buffer.seek(0)
+    dbapi_connection = db.session.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(
+            'COPY show (venue_id, artist_id, start_time, duration_minutes) FROM STDIN WITH (FORMAT csv)', buffer
+        )
+    return len(batch)
+
+
+def insert_batch(model, batch, use_copy):
+    if use_copy:
+        return copy_shows(batch)
+    # executemany; SQLAlchemy batches these into multi-row INSERT ... RETURNING.
+    result = db.session.execute(insert(model).returning(model.id), batch)
+    return len(result.all())
+
+
+@click.command('import')
+@click.argument('kind', type=click.Choice(list(KINDS)))
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']),
+              help='Input format; guessed from the file extension by default.')
+@click.option('--batch-size', default=5000, show_default=True)
+@click.option('--rejects', type=click.Path(dir_okay=False),
+              help='Write rejected rows and their errors to this JSONL file.')
+@click.option('--copy/--no-copy', 'use_copy', default=True, show_default=True,
+              help='Load shows with COPY on Postgres.')
+def import_command(kind, path, fmt, batch_size, rejects, use_copy):
+    """Bulk-load venues, artists or shows from a CSV or JSONL file.
+
+    Rows are validated with the same forms as the web UI. Genres in CSV
+    files are separated by semicolons. Each batch is committed on its own,
+    so a failure keeps the batches before it.
+    """
+    spec = KINDS[kind]
+    if fmt is None:
+        fmt = 'jsonl' if '.jsonl' in path or '.ndjson' in path else 'csv'
+    use_copy = use_copy and kind == 'shows' and db.engine.dialect.name == 'postgresql'
+    rejects_file = open(rejects, 'w') if rejects else None
+
+    read = inserted = rejected = 0
+    batch, batch_lines = [], []
+    started = time.perf_counter()
+
+    def reject(line, row, errors):
+        nonlocal rejected
+        rejected += 1
+        if rejects_file:
+            rejects_file.write(json.dumps({'line': line, 'errors': errors, 'row': row}, default=str) + '\n')
+        elif rejected <= 10:
+            click.echo(f'line {line}: {errors}', err=True)
+
+    def flush():
+        nonlocal inserted
+        if not batch:
+            return
+        rows = batch
+        if spec['model'] is Show:
+            bad = missing_references(batch)
+            for i in sorted(bad):
+                reject(batch_lines[i], batch[i], {'venue_id/artist_id': ['unknown venue or artist']})
+            kept = [i for i in range(len(batch)) if i not in bad]
+            # Checked against existing shows and earlier rows, so a clash
+            # costs that row rather than failing the batch.
+            clashes = double_booked([batch[i] for i in kept])
+            for position in sorted(clashes):
+                i = kept[position]
+                reject(batch_lines[i], batch[i], {'start_time': ['venue or artist already booked at that time']})
+            rows = [batch[i] for position, i in enumerate(kept) if position not in clashes]
+        if rows:
+            inserted += insert_batch(spec['model'], rows, use_copy)
+            if spec['model'] is Show:
+                # Core inserts skip the ORM flush hooks, so update counters
+                # and change timestamps here.
+                venue_ids = {values['venue_id'] for values in rows}
+                artist_ids = {values['artist_id'] for values in rows}
+                refresh_counts(db.session.connection(), venue_ids, artist_ids)
+                touch_show_owners(db.session.connection(), venue_ids, artist_ids)
+        db.session.commit()
+        batch.clear()
+        batch_lines.clear()
+
+    try:
+        for line, row, errors in read_rows(path, fmt):
+            read += 1
+            if errors is None:
+                values, errors = validate(row, spec)
+            if errors:
+                reject(line, row, errors)
+                continue
+            batch.append(values)
+            batch_lines.append(line)
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        if rejects_file:
+            rejects_file.close()
+
+    elapsed = time.perf_counter() - started
+    rate = inserted / elapsed if elapsed else 0
+    click.echo(f'{kind}: read {read}, inserted {inserted}, rejected {rejected} '
+               f'in {elapsed:.1f}s ({rate:,.0f} rows/s)')
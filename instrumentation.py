@@ -0,0 +1,178 @@
+import json
+import logging
+import os
+import time
+import weakref
+from datetime import datetime, timezone
+from flask import before_render_template, g, has_app_context, request, request_started, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app_logging import DroppingQueueHandler, start_queue_listener
+
+
+class RequestLog:
+    """Appends one JSON record per request to ``REQUEST_LOG_PATH``.
+
+    Requests only queue the line; a listener thread appends it to the file,
+    as for the app log (LOG_QUEUE_SIZE and LOG_DROP_POLICY apply). Workers
+    forked from a preloaded app start their own listener. Lines are written
+    whole in append mode, so workers can share the file.
+    """
+
+    def __init__(self, path, queue_size=10000, policy='drop-new'):
+        self.path = path
+        self.queue_size = queue_size
+        self.handler = DroppingQueueHandler(None, policy=policy)
+        self.listener = None
+        self.start()
+        _request_logs.add(self)
+
+    def start(self):
+        file_handler = logging.FileHandler(self.path, delay=True)
+        file_handler.setFormatter(logging.Formatter('%(message)s'))
+        self.listener = start_queue_listener(self.handler, file_handler, self.queue_size)
+
+    def write(self, record):
+        line = json.dumps(record, separators=(',', ':'))
+        self.handler.handle(logging.makeLogRecord({'msg': line, 'levelno': logging.INFO}))
+
+
+class CountingCursor:
+    """DBAPI cursor proxy that adds the rows fetched through it to ``metrics``."""
+
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._metrics['rows'] += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._metrics['rows'] += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._metrics['rows'] += len(rows)
+        return rows
+
+
+# Request logs to restart in forked children; see app_logging for why the
+# fork hook is registered once.
+_request_logs = weakref.WeakSet()
+
+
+def _restart_request_logs():
+    for log in list(_request_logs):
+        log.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_request_logs)
+
+
+def current_metrics():
+    """Timing totals for the request being handled, or None outside a request."""
+    if has_app_context():
+        return g.get('request_metrics')
+    return None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start'].pop()
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics['queries'] += 1
+        metrics['db_time'] += elapsed
+        # The result is built from context.cursor after this event, so rows
+        # are counted as they are fetched. (rowcount is -1 or 0 for SELECTs
+        # on most drivers.)
+        if context is not None and cursor.description is not None:
+            context.cursor = CountingCursor(cursor, metrics)
+
+
+def _request_started(sender, **extra):
+    g.request_metrics = {
+        'start': time.perf_counter(),
+        'queries': 0,
+        'rows': 0,
+        'db_time': 0.0,
+        'template_time': 0.0,
+        'template_start': None,
+        'pool_wait': 0.0,
+    }
+
+
+def _before_render_template(sender, template, context, **extra):
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics['template_start'] = time.perf_counter()
+
+
+def _template_rendered(sender, template, context, **extra):
+    metrics = current_metrics()
+    if metrics is not None and metrics['template_start'] is not None:
+        metrics['template_time'] += time.perf_counter() - metrics['template_start']
+        metrics['template_start'] = None
+
+
+def init_instrumentation(app):
+    """Time every request's queries and templates.
+
+    Totals go out in a ``Server-Timing`` header and, when ``REQUEST_LOG_PATH``
+    is set, as one JSON line per request. Streamed responses are measured
+    up to the point their headers are sent.
+    """
+    path = app.config.get('REQUEST_LOG_PATH')
+    log = RequestLog(path, app.config['LOG_QUEUE_SIZE'], app.config['LOG_DROP_POLICY']) if path else None
+    app.extensions['request_log'] = log
+
+    request_started.connect(_request_started, app)
+    before_render_template.connect(_before_render_template, app)
+    template_rendered.connect(_template_rendered, app)
+
+    @app.after_request
+    def record_request_metrics(response):
+        metrics = g.pop('request_metrics', None)
+        if metrics is None:
+            return response
+        wall_ms = (time.perf_counter() - metrics['start']) * 1000
+        db_ms = metrics['db_time'] * 1000
+        template_ms = metrics['template_time'] * 1000
+        pool_wait_ms = metrics['pool_wait'] * 1000
+
+        response.headers.add(
+            'Server-Timing',
+            f'db;dur={db_ms:.2f};desc="{metrics["queries"]} queries", '
+            f'pool;dur={pool_wait_ms:.2f}, tpl;dur={template_ms:.2f}, total;dur={wall_ms:.2f}'
+        )
+
+        if log is not None:
+            log.write({
+                'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                'method': request.method,
+                'route': request.url_rule.rule if request.url_rule else None,
+                'endpoint': request.endpoint,
+                'path': request.path,
+                'status': response.status_code,
+                'wall_ms': round(wall_ms, 3),
+                'db_ms': round(db_ms, 3),
+                'queries': metrics['queries'],
+                'rows': metrics['rows'],
+                'pool_wait_ms': round(pool_wait_ms, 3),
+                'template_ms': round(template_ms, 3),
+            })
+        return response
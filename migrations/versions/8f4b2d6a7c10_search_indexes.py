@@ -0,0 +1,55 @@
+"""trigram search indexes on venue and artist
+
+Revision ID: 8f4b2d6a7c10
+Revises: 3c1a9e0d5b21
+Create Date: 2025-02-03 18:42:51.207118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f4b2d6a7c10'
+down_revision = '3c1a9e0d5b21'
+branch_labels = None
+depends_on = None
+
+TRGM_INDEXES = [
+    ('ix_venue_name_trgm', 'venue', 'name'),
+    ('ix_venue_city_trgm', 'venue', 'city'),
+    ('ix_artist_name_trgm', 'artist', 'name'),
+    ('ix_artist_city_trgm', 'artist', 'city'),
+]
+
+GENRE_INDEXES = [
+    ('ix_venue_genres_gin', 'venue'),
+    ('ix_artist_genres_gin', 'artist'),
+]
+
+
+def upgrade():
+    # pg_trgm and array GIN indexes are Postgres-only; the SQLite search
+    # backend keeps its own FTS5 tables (see search.py).
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRGM_INDEXES:
+        op.create_index(
+            name, table, [column],
+            postgresql_using='gin',
+            postgresql_ops={column: 'gin_trgm_ops'}
+        )
+    for name, table in GENRE_INDEXES:
+        op.create_index(name, table, ['genres'], postgresql_using='gin')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    for name, table in GENRE_INDEXES:
+        op.drop_index(name, table_name=table)
+    for name, table, _ in TRGM_INDEXES:
+        op.drop_index(name, table_name=table)
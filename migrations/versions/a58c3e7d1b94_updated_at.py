@@ -0,0 +1,38 @@
+"""updated_at change timestamps
+
+Revision ID: a58c3e7d1b94
+Revises: f19d6b4e2a37
+Create Date: 2025-03-19 11:08:36.517290
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a58c3e7d1b94'
+down_revision = 'f19d6b4e2a37'
+branch_labels = None
+depends_on = None
+
+TABLES = ('venue', 'artist', 'show')
+
+
+def upgrade():
+    # Existing rows start out as changed now. The server default (UTC, like
+    # models.utcnow) also covers rows loaded with COPY.
+    if op.get_bind().dialect.name == 'postgresql':
+        default = sa.text("timezone('utc', now())")
+    else:
+        default = sa.text('CURRENT_TIMESTAMP')
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=default))
+        op.create_index(f'ix_{table}_updated_at_id', table, ['updated_at', 'id'])
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_index(f'ix_{table}_updated_at_id', table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,26 @@
+"""name, id indexes for keyset-paginated listings
+
+Revision ID: b27e5f9c4a83
+Revises: 8f4b2d6a7c10
+Create Date: 2025-02-11 09:27:33.640182
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b27e5f9c4a83'
+down_revision = '8f4b2d6a7c10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_venue_name_id', 'venue', ['name', 'id'])
+    op.create_index('ix_artist_name_id', 'artist', ['name', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_artist_name_id', table_name='artist')
+    op.drop_index('ix_venue_name_id', table_name='venue')
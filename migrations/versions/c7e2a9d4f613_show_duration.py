@@ -0,0 +1,49 @@
+"""show duration and double-booking exclusion constraints
+
+Revision ID: c7e2a9d4f613
+Revises: a58c3e7d1b94
+Create Date: 2025-03-27 15:21:04.118532
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a9d4f613'
+down_revision = 'a58c3e7d1b94'
+branch_labels = None
+depends_on = None
+
+TIME_RANGE = "tsrange(start_time, start_time + duration_minutes * interval '1 minute')"
+EXCLUSIONS = [
+    ('ex_show_venue_time', 'venue_id'),
+    ('ex_show_artist_time', 'artist_id'),
+]
+
+
+def upgrade():
+    # Existing shows get the default two hours.
+    with op.batch_alter_table('show') as batch_op:
+        batch_op.add_column(sa.Column('duration_minutes', sa.Integer(), nullable=False, server_default='120'))
+        batch_op.create_check_constraint('ck_show_duration_positive', 'duration_minutes > 0')
+
+    # The exclusion constraints are Postgres-only; elsewhere scheduling.py's
+    # checks are all there is. btree_gist lets GiST compare the integer ids.
+    # If existing shows already overlap, this fails naming a clashing pair:
+    # move or shorten those shows first.
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    for name, column in EXCLUSIONS:
+        op.execute(f'ALTER TABLE show ADD CONSTRAINT {name} EXCLUDE USING gist ({column} WITH =, {TIME_RANGE} WITH &&)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for name, _ in reversed(EXCLUSIONS):
+            op.drop_constraint(name, 'show')
+    with op.batch_alter_table('show') as batch_op:
+        batch_op.drop_constraint('ck_show_duration_positive', type_='check')
+        batch_op.drop_column('duration_minutes')
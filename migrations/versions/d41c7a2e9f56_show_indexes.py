@@ -0,0 +1,28 @@
+"""composite indexes on show
+
+Revision ID: d41c7a2e9f56
+Revises: b27e5f9c4a83
+Create Date: 2025-02-18 14:05:12.883015
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41c7a2e9f56'
+down_revision = 'b27e5f9c4a83'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_show_venue_id_start_time', 'show', ['venue_id', 'start_time'])
+    op.create_index('ix_show_artist_id_start_time', 'show', ['artist_id', 'start_time'])
+    op.create_index('ix_show_start_time_id', 'show', ['start_time', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_show_start_time_id', table_name='show')
+    op.drop_index('ix_show_artist_id_start_time', table_name='show')
+    op.drop_index('ix_show_venue_id_start_time', table_name='show')
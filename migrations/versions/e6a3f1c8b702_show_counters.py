@@ -0,0 +1,57 @@
+"""upcoming/past show counters
+
+Revision ID: e6a3f1c8b702
+Revises: d41c7a2e9f56
+Create Date: 2025-03-04 09:41:27.204518
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a3f1c8b702'
+down_revision = 'd41c7a2e9f56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('venue_show_count',
+    sa.Column('venue_id', sa.Integer(), nullable=False),
+    sa.Column('upcoming', sa.Integer(), nullable=False),
+    sa.Column('past', sa.Integer(), nullable=False),
+    sa.Column('next_show_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['venue_id'], ['venue.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('venue_id')
+    )
+    op.create_index('ix_venue_show_count_next_show_at', 'venue_show_count', ['next_show_at'])
+    op.create_table('artist_show_count',
+    sa.Column('artist_id', sa.Integer(), nullable=False),
+    sa.Column('upcoming', sa.Integer(), nullable=False),
+    sa.Column('past', sa.Integer(), nullable=False),
+    sa.Column('next_show_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['artist_id'], ['artist.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('artist_id')
+    )
+    op.create_index('ix_artist_show_count_next_show_at', 'artist_show_count', ['next_show_at'])
+
+    # Backfill from existing shows.
+    now = sa.bindparam('now', datetime.now())
+    for table, key in (('venue_show_count', 'venue_id'), ('artist_show_count', 'artist_id')):
+        op.get_bind().execute(sa.text(
+            f'INSERT INTO {table} ({key}, upcoming, past, next_show_at) '
+            f'SELECT {key}, '
+            f'SUM(CASE WHEN start_time > :now THEN 1 ELSE 0 END), '
+            f'SUM(CASE WHEN start_time > :now THEN 0 ELSE 1 END), '
+            f'MIN(CASE WHEN start_time > :now THEN start_time END) '
+            f'FROM show GROUP BY {key}'
+        ).bindparams(now))
+
+
+def downgrade():
+    op.drop_index('ix_artist_show_count_next_show_at', table_name='artist_show_count')
+    op.drop_table('artist_show_count')
+    op.drop_index('ix_venue_show_count_next_show_at', table_name='venue_show_count')
+    op.drop_table('venue_show_count')
@@ -0,0 +1,26 @@
+"""venue area index
+
+Revision ID: f19d6b4e2a37
+Revises: e6a3f1c8b702
+Create Date: 2025-03-11 16:22:48.903417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f19d6b4e2a37'
+down_revision = 'e6a3f1c8b702'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves the area directory's GROUP BY state, city and the area-ordered
+    # keyset pagination of /venues and /venues/area/<state>/<city>.
+    op.create_index('ix_venue_state_city_name_id', 'venue', ['state', 'city', 'name', 'id'])
+
+
+def downgrade():
+    op.drop_index('ix_venue_state_city_name_id', table_name='venue')
@@ -1,7 +1,23 @@
+from datetime import datetime, timezone
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects.postgresql import ARRAY, ExcludeConstraint
+from routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+# Postgres stores genres as a native array; SQLite (local runs, FTS5
+# search backend) falls back to a JSON list.
+GenreList = ARRAY(db.String).with_variant(db.JSON, 'sqlite')
+
+def utcnow():
+    """Naive UTC timestamp for the updated_at columns."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def updated_at_column():
+    # Set on insert and on every ORM or core UPDATE; changes to a venue's or
+    # artist's shows touch it too (see conditional.py).
+    return db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
 
 class Venue(db.Model):
     __tablename__ = 'venue'
@@ -17,9 +33,23 @@ class Venue(db.Model):
     seeking_talent = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(500), nullable=True)
     website_link = db.Column(db.String(500), nullable=True)
-    genres = db.Column(ARRAY(db.String), nullable=False)
+    genres = db.Column(GenreList, nullable=False)
+    updated_at = updated_at_column()
     shows = db.relationship('Show', back_populates='venue', cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Search indexes are Postgres-only, as in the migration; SQLite
+        # searches through its FTS tables instead.
+        db.Index('ix_venue_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_venue_city_trgm', 'city', postgresql_using='gin',
+                 postgresql_ops={'city': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_venue_genres_gin', 'genres', postgresql_using='gin').ddl_if(dialect='postgresql'),
+        db.Index('ix_venue_name_id', 'name', 'id'),
+        db.Index('ix_venue_updated_at_id', 'updated_at', 'id'),
+        db.Index('ix_venue_state_city_name_id', 'state', 'city', 'name', 'id'),
+    )
+
 class Artist(db.Model):
     __tablename__ = 'artist'
 
@@ -33,9 +63,28 @@ class Artist(db.Model):
     facebook_link = db.Column(db.String(120), nullable=True)
     seeking_venue = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String, nullable=True)
-    genres = db.Column(ARRAY(db.String), nullable=False)
+    genres = db.Column(GenreList, nullable=False)
+    updated_at = updated_at_column()
     shows = db.relationship('Show', back_populates='artist', cascade="all, delete-orphan")
 
+    __table_args__ = (
+        db.Index('ix_artist_name_trgm', 'name', postgresql_using='gin',
+                 postgresql_ops={'name': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_artist_city_trgm', 'city', postgresql_using='gin',
+                 postgresql_ops={'city': 'gin_trgm_ops'}).ddl_if(dialect='postgresql'),
+        db.Index('ix_artist_genres_gin', 'genres', postgresql_using='gin').ddl_if(dialect='postgresql'),
+        db.Index('ix_artist_name_id', 'name', 'id'),
+        db.Index('ix_artist_updated_at_id', 'updated_at', 'id'),
+    )
+
+# How long a show holds its venue and artist, in minutes.
+DEFAULT_SHOW_MINUTES = 120
+MAX_SHOW_MINUTES = 24 * 60
+
+def show_time_range(start_time, duration_minutes):
+    """Postgres ``tsrange`` a show occupies: ``[start, start + duration)``."""
+    return func.tsrange(start_time, start_time + duration_minutes * literal_column("interval '1 minute'"))
+
 class Show(db.Model):
     __tablename__ = 'show'
 
@@ -43,5 +92,44 @@ class Show(db.Model):
     venue_id = db.Column(db.Integer, db.ForeignKey('venue.id', ondelete='CASCADE'), nullable=False)
     artist_id = db.Column(db.Integer, db.ForeignKey('artist.id', ondelete='CASCADE'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=False)
+    duration_minutes = db.Column(db.Integer, nullable=False, default=DEFAULT_SHOW_MINUTES,
+                                 server_default=str(DEFAULT_SHOW_MINUTES))
     venue = db.relationship('Venue', back_populates='shows')
+    updated_at = updated_at_column()
     artist = db.relationship('Artist', back_populates='shows')
+
+    __table_args__ = (
+        db.Index('ix_show_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_show_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_show_start_time_id', 'start_time', 'id'),
+        db.Index('ix_show_updated_at_id', 'updated_at', 'id'),
+        db.CheckConstraint('duration_minutes > 0', name='ck_show_duration_positive'),
+        # No venue or artist is booked twice at once (btree_gist; see scheduling.py).
+        ExcludeConstraint(
+            (venue_id, '='), (show_time_range(start_time, duration_minutes), '&&'),
+            name='ex_show_venue_time', using='gist',
+        ).ddl_if(dialect='postgresql'),
+        ExcludeConstraint(
+            (artist_id, '='), (show_time_range(start_time, duration_minutes), '&&'),
+            name='ex_show_artist_time', using='gist',
+        ).ddl_if(dialect='postgresql'),
+    )
+
+# Upcoming/past show counts per venue and artist, kept up to date by
+# counters.py. next_show_at is the earliest upcoming show; once it has
+# passed the row is due for `flask show-counts roll`.
+class VenueShowCount(db.Model):
+    __tablename__ = 'venue_show_count'
+
+    venue_id = db.Column(db.Integer, db.ForeignKey('venue.id', ondelete='CASCADE'), primary_key=True)
+    upcoming = db.Column(db.Integer, nullable=False, default=0)
+    past = db.Column(db.Integer, nullable=False, default=0)
+    next_show_at = db.Column(db.DateTime, nullable=True, index=True)
+
+class ArtistShowCount(db.Model):
+    __tablename__ = 'artist_show_count'
+
+    artist_id = db.Column(db.Integer, db.ForeignKey('artist.id', ondelete='CASCADE'), primary_key=True)
+    upcoming = db.Column(db.Integer, nullable=False, default=0)
+    past = db.Column(db.Integer, nullable=False, default=0)
+    next_show_at = db.Column(db.DateTime, nullable=True, index=True)
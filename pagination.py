@@ -0,0 +1,107 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from flask import abort, current_app, request, url_for
+from sqlalchemy import tuple_
+
+
+class Page:
+    """One window of a keyset-paginated query.
+
+    ``next_cursor``/``prev_cursor`` are opaque tokens for the ``after`` and
+    ``before`` query arguments, or None at either end of the listing.
+    """
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value['dt'])
+    return value
+
+
+def encode_cursor(values):
+    payload = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in values]
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        abort(400)
+    if len(values) != size:
+        abort(400)
+    return values
+
+
+def paginate(query, keys, after=None, before=None, per_page=None):
+    """Keyset-paginate ``query`` on the unique, ordered ``keys`` columns.
+
+    The query must select the key columns under their own names. Pages are
+    fetched with a row-value comparison against the cursor rather than
+    OFFSET, so every page costs the same as the first given an index on
+    ``keys``.
+    """
+    if per_page is None:
+        per_page = current_app.config['PAGE_SIZE']
+    names = [key.key for key in keys]
+
+    def cursor_for(row):
+        return encode_cursor([getattr(row, name) for name in names])
+
+    if before:
+        cursor = decode_cursor(before, len(keys))
+        query = query.filter(tuple_(*keys) < tuple_(*cursor)) \
+            .order_by(*[key.desc() for key in keys])
+    else:
+        if after:
+            cursor = decode_cursor(after, len(keys))
+            query = query.filter(tuple_(*keys) > tuple_(*cursor))
+        query = query.order_by(*keys)
+
+    rows = query.limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if before:
+        rows.reverse()
+        prev_cursor = cursor_for(rows[0]) if has_more else None
+        next_cursor = cursor_for(rows[-1]) if rows else None
+    else:
+        next_cursor = cursor_for(rows[-1]) if has_more else None
+        prev_cursor = cursor_for(rows[0]) if after and rows else None
+
+    return Page(rows, next_cursor=next_cursor, prev_cursor=prev_cursor)
+
+
+def page_url(after=None, before=None):
+    """URL of the current listing with its cursor replaced, keeping other arguments."""
+    args = {
+        key: values for key, values in request.args.lists()
+        if key not in ('after', 'before')
+    }
+    if after:
+        args['after'] = after
+    if before:
+        args['before'] = before
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
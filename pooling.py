@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+import weakref
+from flask import current_app, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool, QueuePool
+from instrumentation import current_metrics
+
+
+class PoolStats:
+    """Process-wide totals for connection checkout wait time, served at /api/pool-stats."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, elapsed):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'wait_total_ms': round(self.wait_total * 1000, 3),
+                'wait_avg_ms': round(self.wait_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+                'wait_max_ms': round(self.wait_max * 1000, 3),
+            }
+
+
+pool_stats = PoolStats()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited.
+
+    The wait includes opening a new connection when the pool grows into its
+    overflow, and blocking when the pool is exhausted. Per-request totals
+    show up as ``pool`` in Server-Timing and ``pool_wait_ms`` in the request log.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - started
+            pool_stats.record(elapsed)
+            metrics = current_metrics()
+            if metrics is not None:
+                metrics['pool_wait'] += elapsed
+
+
+def engine_options(config):
+    """SQLALCHEMY_ENGINE_OPTIONS for the configured database and pool profile."""
+    url = config['SQLALCHEMY_DATABASE_URI']
+    options = {'pool_pre_ping': config['DB_POOL_PRE_PING']}
+
+    if url.startswith('sqlite'):
+        # SQLite picks its own pool; sizing options don't apply.
+        return options
+
+    if config['DB_POOL_PROFILE'] == 'pgbouncer':
+        # PgBouncer in transaction mode does the pooling, so every checkout
+        # opens a cheap connection to the bouncer instead. Session state
+        # doesn't survive between transactions, which is why statement
+        # timeouts are applied with SET LOCAL.
+        options.update(poolclass=NullPool, pool_pre_ping=False)
+        return options
+
+    options.update(
+        poolclass=TimedQueuePool,
+        pool_size=config['DB_POOL_SIZE'],
+        max_overflow=config['DB_MAX_OVERFLOW'],
+        pool_timeout=config['DB_POOL_TIMEOUT'],
+        pool_recycle=config['DB_POOL_RECYCLE'],
+    )
+    return options
+
+
+def statement_timeout():
+    """Timeout in ms for the current request's endpoint; 0 means none."""
+    if not has_request_context():
+        return 0
+    config = current_app.config
+    return config['DB_STATEMENT_TIMEOUTS'].get(request.endpoint, config['DB_STATEMENT_TIMEOUT_MS'])
+
+
+@event.listens_for(Session, 'after_begin')
+def _apply_statement_timeout(session, transaction, connection):
+    if connection.dialect.name != 'postgresql':
+        return
+    timeout = statement_timeout()
+    if timeout:
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
+
+
+def init_pooling(app):
+    """Fill in SQLALCHEMY_ENGINE_OPTIONS; call before ``db.init_app``."""
+    options = engine_options(app.config)
+    options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+    app.extensions['pool_stats'] = pool_stats
+
+
+# Apps whose engines are disposed of in forked children; see app_logging
+# for why the fork hook is registered once.
+_fork_safe_apps = weakref.WeakSet()
+
+
+def _dispose_engines():
+    for app in list(_fork_safe_apps):
+        with app.app_context():
+            for engine in app.extensions['sqlalchemy'].engines.values():
+                engine.dispose(close=False)
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_dispose_engines)
+
+
+def init_fork_safety(app):
+    """Drop pooled connections inherited by a forked worker; call after ``db.init_app``.
+
+    ``close=False`` leaves the sockets to the parent that opened them; the
+    child just starts with empty pools.
+    """
+    _fork_safe_apps.add(app)
@@ -0,0 +1,113 @@
+"""Read-replica routing for the Flask-SQLAlchemy session.
+
+Replicas are ordinary SQLAlchemy binds named ``replica_<n>`` (built from
+DATABASE_REPLICA_URLS in config.py). GET/HEAD requests read from one
+healthy replica; everything else, flushes included, uses the primary. After
+a client commits a write, its reads stay on the primary for
+REPLICA_STICKY_SECONDS so it sees its own changes despite replication lag.
+
+Two local databases are enough to try it out:
+
+    DATABASE_URL=sqlite:////tmp/primary.db \\
+    DATABASE_REPLICA_URLS=sqlite:////tmp/replica.db flask run
+"""
+import itertools
+import threading
+import time
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session as BaseSession
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+READ_METHODS = ('GET', 'HEAD')
+STICKY_KEY = '_primary_until'
+
+
+class ReplicaRouter:
+    """Tracks replica bind keys and their health."""
+
+    def __init__(self):
+        self.keys = []
+        self.health_interval = 10
+        self.sticky_seconds = 5
+        self._health = {}
+        self._cycle = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.keys = sorted(key for key in app.config.get('SQLALCHEMY_BINDS') or {} if key.startswith('replica_'))
+        self.health_interval = app.config['REPLICA_HEALTH_INTERVAL']
+        self.sticky_seconds = app.config['REPLICA_STICKY_SECONDS']
+        self._health = {key: (True, 0.0) for key in self.keys}
+        self._cycle = itertools.cycle(self.keys) if self.keys else None
+        app.extensions['replica_router'] = self
+
+    def mark(self, key, healthy):
+        with self._lock:
+            self._health[key] = (healthy, time.monotonic())
+
+    def is_healthy(self, key, engines):
+        healthy, checked = self._health[key]
+        if time.monotonic() - checked < self.health_interval:
+            return healthy
+        try:
+            with engines[key].connect() as connection:
+                connection.execute(text('SELECT 1'))
+            healthy = True
+        except Exception as e:
+            current_app.logger.warning('Replica %s failed its health check: %s', key, e)
+            healthy = False
+        self.mark(key, healthy)
+        return healthy
+
+    def choose(self, engines):
+        """Next healthy replica bind key in round-robin order, or None."""
+        if self._cycle is None:
+            return None
+        for _ in range(len(self.keys)):
+            with self._lock:
+                key = next(self._cycle)
+            if self.is_healthy(key, engines):
+                return key
+        return None
+
+
+replicas = ReplicaRouter()
+
+
+def reads_from_replica():
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+    return session.get(STICKY_KEY, 0) < time.time()
+
+
+class RoutingSession(BaseSession):
+    """Session that sends read-only requests to a replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and replicas.keys and not self._flushing and reads_from_replica():
+            # One replica per request, so a page never mixes replicas.
+            if 'replica_key' not in g:
+                g.replica_key = replicas.choose(self._db.engines)
+            if g.replica_key is not None:
+                return self._db.engines[g.replica_key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(Session, 'after_commit')
+def _stick_to_primary(session_):
+    if replicas.keys and has_request_context() and request.method not in READ_METHODS:
+        session[STICKY_KEY] = time.time() + replicas.sticky_seconds
+
+
+def init_replicas(app, db):
+    """Register replica binds with the router; call after ``db.init_app``."""
+    replicas.init_app(app)
+    with app.app_context():
+        for key in replicas.keys:
+            engine = db.engines[key]
+
+            @event.listens_for(engine, 'handle_error')
+            def _mark_down(context, key=key):
+                if context.is_disconnect:
+                    replicas.mark(key, False)
@@ -0,0 +1,188 @@
+"""Double-booking checks for shows.
+
+A show holds its venue and its artist from ``start_time`` for
+``duration_minutes``. Two shows clash when they share either one and their
+half-open ``[start, end)`` times overlap, so back-to-back shows are fine.
+
+On Postgres the ``ex_show_venue_time`` and ``ex_show_artist_time``
+exclusion constraints (GiST indexes over ``tsrange``) enforce this on every
+write. ``find_conflicts`` checks a batch of proposed shows up front, for
+form errors, ``flask import`` and ``POST /api/shows/check``. The batch is
+sent as a single JSON parameter that the database expands into one search
+window per proposal (``json_to_recordset`` on Postgres, ``json_each`` on
+SQLite), and existing shows are joined against those windows through the
+``(venue_id, start_time)`` and ``(artist_id, start_time)`` indexes, so a
+batch of any size is one query that reads only nearby shows. Those shows
+and the proposals then go into an interval tree per venue and per artist,
+and each proposal's time is looked up in its venue's and artist's trees.
+"""
+import json
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import DateTime, Integer, and_, column, func, select, union
+from models import db, Show, DEFAULT_SHOW_MINUTES, MAX_SHOW_MINUTES
+
+# Show columns a booking is held against
+RESOURCES = ('venue_id', 'artist_id')
+EXCLUSION_VIOLATION = '23P01'
+
+
+class IntervalTree:
+    """Static interval tree over half-open ``(start, end, item)`` intervals.
+
+    Intervals are sorted by start and laid out as an implicit balanced
+    search tree: the middle of each slice is the root of that slice. Each
+    node also keeps the latest end in its subtree, so a query skips every
+    subtree that ends before it begins. Building is O(n log n); a query is
+    O(log n + k) for k overlaps.
+    """
+
+    def __init__(self, intervals):
+        self._nodes = sorted(intervals, key=lambda interval: interval[0])
+        self._max_end = [None] * len(self._nodes)
+        self._build(0, len(self._nodes))
+
+    def _build(self, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        latest = self._nodes[mid][1]
+        for child in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child is not None and child > latest:
+                latest = child
+        self._max_end[mid] = latest
+        return latest
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def overlapping(self, start, end):
+        """Items whose interval overlaps ``[start, end)``."""
+        hits = []
+        slices = [(0, len(self._nodes))]
+        while slices:
+            lo, hi = slices.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start:
+                continue
+            node_start, node_end, item = self._nodes[mid]
+            slices.append((lo, mid))
+            # Everything to the right starts at or after this node.
+            if node_start < end:
+                if node_end > start:
+                    hits.append(item)
+                slices.append((mid + 1, hi))
+        return hits
+
+
+def show_end(start_time, duration_minutes):
+    return start_time + timedelta(minutes=duration_minutes or DEFAULT_SHOW_MINUTES)
+
+
+def _timestamp(value):
+    # The format SQLAlchemy stores DateTime values in on SQLite, which
+    # compares correctly as text; Postgres parses it as a timestamp.
+    return value.isoformat(sep=' ', timespec='microseconds')
+
+
+def proposal_windows(proposals):
+    """Rows of ``(venue_id, artist_id, since, until)``, one per proposal.
+
+    A show starting strictly inside ``(since, until)`` may overlap the
+    proposal: no show is longer than MAX_SHOW_MINUTES, so anything that
+    started earlier has ended.
+    """
+    payload = json.dumps([
+        {
+            'venue_id': proposal['venue_id'],
+            'artist_id': proposal['artist_id'],
+            'since': _timestamp(proposal['start_time'] - timedelta(minutes=MAX_SHOW_MINUTES)),
+            'until': _timestamp(show_end(proposal['start_time'], proposal.get('duration_minutes'))),
+        }
+        for proposal in proposals
+    ])
+    if db.engine.dialect.name == 'postgresql':
+        return func.json_to_recordset(payload).table_valued(
+            column('venue_id', Integer),
+            column('artist_id', Integer),
+            column('since', DateTime),
+            column('until', DateTime),
+        ).render_derived(name='proposal', with_types=True)
+    rows = func.json_each(payload).table_valued('value')
+    return select(*[
+        func.json_extract(rows.c.value, f'$.{name}').label(name)
+        for name in ('venue_id', 'artist_id', 'since', 'until')
+    ]).subquery('proposal')
+
+
+def existing_shows(proposals):
+    """Shows that could clash with ``proposals``, in one indexed query."""
+    windows = proposal_windows(proposals)
+    return db.session.execute(union(*[
+        select(Show.id, Show.venue_id, Show.artist_id, Show.start_time, Show.duration_minutes)
+        .join(windows, and_(
+            getattr(Show, resource) == windows.c[resource],
+            Show.start_time > windows.c.since,
+            Show.start_time < windows.c.until,
+        ))
+        for resource in RESOURCES
+    ])).all()
+
+
+def find_conflicts(proposals):
+    """Clashes for each proposed show, with existing shows and with each other.
+
+    ``proposals`` are dicts with ``venue_id``, ``artist_id``, ``start_time``
+    and optionally ``duration_minutes``. Returns ``{position: [conflict,
+    ...]}`` for the proposals that clash. Each conflict names the resource
+    (``venue_id`` or ``artist_id``) and either the existing ``show_id`` or
+    the other ``proposal`` position.
+    """
+    if not proposals:
+        return {}
+    wanted = {(resource, proposal[resource]) for proposal in proposals for resource in RESOURCES}
+
+    intervals = defaultdict(list)
+    for show in existing_shows(proposals):
+        end = show_end(show.start_time, show.duration_minutes)
+        for resource in RESOURCES:
+            key = (resource, getattr(show, resource))
+            if key in wanted:
+                intervals[key].append((show.start_time, end, ('show_id', show.id)))
+    for position, proposal in enumerate(proposals):
+        end = show_end(proposal['start_time'], proposal.get('duration_minutes'))
+        for resource in RESOURCES:
+            intervals[(resource, proposal[resource])].append((proposal['start_time'], end, ('proposal', position)))
+    trees = {key: IntervalTree(items) for key, items in intervals.items()}
+
+    conflicts = {}
+    for position, proposal in enumerate(proposals):
+        end = show_end(proposal['start_time'], proposal.get('duration_minutes'))
+        for resource in RESOURCES:
+            for kind, ref in trees[(resource, proposal[resource])].overlapping(proposal['start_time'], end):
+                if (kind, ref) != ('proposal', position):
+                    conflicts.setdefault(position, []).append({'resource': resource, kind: ref})
+    return conflicts
+
+
+def double_booked(proposals):
+    """Positions to turn away so the rest can be booked together.
+
+    A proposal is turned away when it clashes with an existing show, or
+    with an earlier proposal that isn't itself turned away.
+    """
+    rejected = set()
+    for position, conflicts in sorted(find_conflicts(proposals).items()):
+        for conflict in conflicts:
+            other = conflict.get('proposal')
+            if other is None or (other < position and other not in rejected):
+                rejected.add(position)
+                break
+    return rejected
+
+
+def is_double_booking(error):
+    """Whether a DBAPI error from a flush is an exclusion-constraint violation."""
+    return getattr(getattr(error, 'orig', None), 'pgcode', None) == EXCLUSION_VIOLATION
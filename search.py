@@ -0,0 +1,239 @@
+from flask import abort, current_app
+from sqlalchemy import and_, case, cast, column, exists, func, literal_column, or_, select, table, text
+from sqlalchemy.dialects.postgresql import ARRAY, array
+from models import db, Venue, Artist
+from enums import Genre
+
+MATCH_MODES = ('any', 'all')
+# Request args read by listing_filters
+FILTER_PARAMS = ('genre', 'match', 'city', 'state')
+
+
+def matching_genres(term):
+    """Genre names and labels whose label contains ``term``.
+
+    Forms store the enum name (``HipHop``) while hand-entered rows tend to
+    use the label (``Hip-Hop``), so both spellings are returned.
+    """
+    term = term.lower()
+    matches = []
+    for genre in Genre:
+        if term in genre.value.lower() or term in genre.name.lower():
+            matches.extend({genre.name, genre.value})
+    return matches
+
+
+def genre_spellings(value):
+    """Stored spellings of the genre named ``value`` (enum name or label)."""
+    value = value.strip().lower()
+    for genre in Genre:
+        if value in (genre.name.lower(), genre.value.lower()):
+            return sorted({genre.name, genre.value})
+    abort(400)
+
+
+def genre_array(values):
+    """``values`` as a varchar[] literal, matching the genres column type."""
+    return cast(array(values), ARRAY(db.String))
+
+
+class PostgresSearchBackend:
+    """Ranked search over the pg_trgm GIN indexes on name and city.
+
+    ``ILIKE '%term%'`` and the ``%`` similarity operator are both served by
+    ``gin_trgm_ops``; genre hits use the GIN index on the genres array.
+    """
+
+    def genre_condition(self, model, genres):
+        """Rows tagged with any of ``genres``; ``&&`` is served by the GIN index."""
+        return model.genres.overlap(genre_array(genres))
+
+    def all_genres_condition(self, model, spellings):
+        """Rows tagged with every genre; ``spellings`` holds each genre's spellings.
+
+        Genres with one spelling collapse into a single ``@>`` containment test.
+        """
+        exact = [names[0] for names in spellings if len(names) == 1]
+        conditions = [model.genres.contains(genre_array(exact))] if exact else []
+        conditions += [self.genre_condition(model, names) for names in spellings if len(names) > 1]
+        return and_(*conditions)
+
+    def search(self, model, term, limit, filters=()):
+        query = db.session.query(model.id, model.name).filter(*filters)
+        if not term:
+            return query.order_by(model.name, model.id).limit(limit).all()
+
+        pattern = f'%{term}%'
+        conditions = [
+            model.name.ilike(pattern),
+            model.name.op('%')(term),
+            model.city.ilike(pattern),
+        ]
+        # city is nullable, and a NULL term would make the whole rank NULL,
+        # which sorts first under DESC.
+        rank = func.coalesce(func.similarity(model.name, term), 0) * 2 \
+            + func.coalesce(func.similarity(model.city, term), 0)
+
+        genres = matching_genres(term)
+        if genres:
+            in_genre = model.genres.overlap(genre_array(genres))
+            conditions.append(in_genre)
+            rank = rank + case((in_genre, 0.5), else_=0)
+
+        return query.filter(or_(*conditions)) \
+            .order_by(rank.desc(), model.name, model.id) \
+            .limit(limit) \
+            .all()
+
+
+class SQLiteSearchBackend:
+    """FTS5 search for local runs without Postgres.
+
+    Each searchable table gets an external-content ``<table>_fts`` index
+    using the trigram tokenizer (substring matches, like ILIKE), kept in
+    sync by triggers. Terms shorter than a trigram fall back to LIKE.
+    Genres are JSON lists here, so genre filters go through ``json_each``.
+    """
+
+    COLUMNS = ('name', 'city', 'genres')
+    # bm25 column weights, in COLUMNS order.
+    WEIGHTS = (10.0, 2.0, 1.0)
+
+    def __init__(self):
+        self._ready = set()
+
+    def ensure_index(self, table):
+        key = (str(db.engine.url), table)
+        if key in self._ready:
+            return
+        fts = f'{table}_fts'
+        columns = ', '.join(self.COLUMNS)
+        new_values = ', '.join(f'new.{c}' for c in self.COLUMNS)
+        old_values = ', '.join(f'old.{c}' for c in self.COLUMNS)
+
+        with db.engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {'name': fts}
+            ).first()
+            if not exists:
+                conn.execute(text(
+                    f"CREATE VIRTUAL TABLE {fts} USING fts5({columns}, "
+                    f"content='{table}', content_rowid='id', tokenize='trigram')"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {table} BEGIN "
+                    f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+                ))
+                conn.execute(text(
+                    f"CREATE TRIGGER {fts}_au AFTER UPDATE ON {table} BEGIN "
+                    f"INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+                    f"INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+                ))
+                conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        self._ready.add(key)
+
+    def genre_condition(self, model, genres):
+        """Rows tagged with any of ``genres``."""
+        tags = func.json_each(model.genres).table_valued('value')
+        return exists(select(1).select_from(tags).where(tags.c.value.in_(genres)))
+
+    def all_genres_condition(self, model, spellings):
+        return and_(*(self.genre_condition(model, names) for names in spellings))
+
+    def search(self, model, term, limit, filters=()):
+        query = db.session.query(model.id, model.name).filter(*filters)
+        if not term:
+            return query.order_by(model.name, model.id).limit(limit).all()
+        if len(term) < 3:
+            pattern = f'%{term}%'
+            return query.filter(or_(model.name.ilike(pattern), model.city.ilike(pattern))) \
+                .order_by(model.name, model.id) \
+                .limit(limit) \
+                .all()
+
+        table_name = model.__tablename__
+        fts = f'{table_name}_fts'
+        self.ensure_index(table_name)
+        fts_table = table(fts, column('rowid'))
+        phrase = '"' + term.replace('"', '""') + '"'
+        return query.join(fts_table, fts_table.c.rowid == model.id) \
+            .filter(literal_column(fts).op('MATCH')(phrase)) \
+            .order_by(func.bm25(literal_column(fts), *self.WEIGHTS), model.name, model.id) \
+            .limit(limit) \
+            .all()
+
+
+_backends = {
+    'postgresql': PostgresSearchBackend(),
+    'sqlite': SQLiteSearchBackend(),
+}
+
+
+def get_backend():
+    dialect = db.engine.dialect.name
+    try:
+        return _backends[dialect]
+    except KeyError:
+        raise RuntimeError(f'No search backend for {dialect!r} databases')
+
+
+def genre_filter(model, genres, match='any'):
+    """Condition for rows tagged with any (or all) of ``genres``."""
+    backend = get_backend()
+    spellings = [genre_spellings(genre) for genre in genres]
+    if match == 'all':
+        return backend.all_genres_condition(model, spellings)
+    return backend.genre_condition(model, [name for names in spellings for name in names])
+
+
+def listing_filters(model, args):
+    """Conditions for the ``genre``, ``match``, ``city`` and ``state`` request args.
+
+    ``genre`` may be repeated; ``match=all`` requires every genre instead
+    of any of them. Unknown genres or match modes are a 400.
+    """
+    conditions = []
+    genres = [genre for genre in args.getlist('genre') if genre.strip()]
+    if genres:
+        match = args.get('match', 'any')
+        if match not in MATCH_MODES:
+            abort(400)
+        conditions.append(genre_filter(model, genres, match))
+    city = args.get('city', '').strip()
+    if city:
+        conditions.append(model.city == city)
+    state = args.get('state', '').strip()
+    if state:
+        conditions.append(model.state == state.upper())
+    return conditions
+
+
+def search(model, term, limit=None, filters=()):
+    """Return ``(id, name)`` rows for ``model`` ranked by relevance to ``term``."""
+    if limit is None:
+        limit = current_app.config['SEARCH_RESULT_LIMIT']
+    return get_backend().search(model, term.strip(), limit, filters)
+
+
+def search_results(model, term, filters=()):
+    """Up to SEARCH_RESULT_LIMIT rows from ``search``, and whether more matched.
+
+    One row past the limit is fetched to tell, so the page can say the
+    count is capped without counting every match.
+    """
+    limit = current_app.config['SEARCH_RESULT_LIMIT']
+    rows = search(model, term, limit + 1, filters)
+    return rows[:limit], len(rows) > limit
+
+
+def search_venues(term, limit=None, filters=()):
+    return search(Venue, term, limit, filters)
+
+
+def search_artists(term, limit=None, filters=()):
+    return search(Artist, term, limit, filters)
@@ -0,0 +1,27 @@
+from models import db, VenueShowCount, ArtistShowCount
+
+
+def upcoming_show_counts(model, key, ids):
+    """Return {id: upcoming show count} for every id in ``ids``.
+
+    Counts are read from the counter table ``model`` (maintained by
+    counters.py) in one query, and ids without upcoming shows map to 0.
+    """
+    ids = list(ids)
+    if not ids:
+        return {}
+
+    column = getattr(model, key)
+    rows = db.session.query(column, model.upcoming).filter(column.in_(ids)).all()
+
+    counts = dict.fromkeys(ids, 0)
+    counts.update(rows)
+    return counts
+
+
+def venue_upcoming_show_counts(venue_ids):
+    return upcoming_show_counts(VenueShowCount, 'venue_id', venue_ids)
+
+
+def artist_upcoming_show_counts(artist_ids):
+    return upcoming_show_counts(ArtistShowCount, 'artist_id', artist_ids)
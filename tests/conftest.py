@@ -0,0 +1,86 @@
+import os
+from contextlib import contextmanager
+
+# config.py reads these at import; keep tests from touching files in the repo.
+os.environ.setdefault('SECRET_KEY', 'test')
+os.environ['REQUEST_LOG_PATH'] = ''
+
+import pytest
+from sqlalchemy import event
+
+import config
+from app import create_app
+from areas import area_directory
+from cache import response_cache
+from models import db, Venue, Artist
+
+
+def settings(**overrides):
+    """config.py as a class, with ``overrides``, for ``create_app``."""
+    values = {name: getattr(config, name) for name in dir(config) if name.isupper()}
+    values.update(
+        TESTING=True,
+        TEMPLATE_CACHE_DIR='',
+        TEMPLATE_WARMUP=False,
+        SQLALCHEMY_BINDS={},
+    )
+    values.update(overrides)
+    return type('TestConfig', (), values)
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """Build an app on a fresh SQLite database in ``tmp_path``, tables created."""
+    def make(**overrides):
+        overrides.setdefault('SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'fyyur.db'}")
+        app = create_app(settings(**overrides))
+        # Process-wide caches outlive each test's database.
+        area_directory.invalidate()
+        response_cache.clear()
+        with app.app_context():
+            db.create_all(bind_key=None)
+        return app
+    return make
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(RESPONSE_CACHE_ENABLED=False)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@contextmanager
+def count_queries(engine):
+    """Collect the SQL statements ``engine`` runs inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+def add_venue(name='The Blue Room', **fields):
+    venue = Venue(name=name, city='Austin', state='TX', address='1 Main St',
+                  phone='512-555-0100', genres=['Jazz'], **fields)
+    db.session.add(venue)
+    db.session.commit()
+    return venue
+
+
+def add_artist(name='Velvet Owls', **fields):
+    artist = Artist(name=name, city='Austin', state='TX', phone='512-555-0101',
+                    genres=['Jazz'], **fields)
+    db.session.add(artist)
+    db.session.commit()
+    return artist
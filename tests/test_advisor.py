@@ -0,0 +1,41 @@
+import sqlite3
+
+import pytest
+
+from advisor import _sqlite_seq_scans
+from benchmarks.generator import generate
+
+
+@pytest.fixture
+def cursor():
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE venue (id INTEGER PRIMARY KEY, name TEXT, city TEXT)')
+    connection.execute('CREATE INDEX ix_venue_name ON venue (name)')
+    yield connection.cursor()
+    connection.close()
+
+
+@pytest.mark.parametrize('statement, scans', [
+    ('SELECT (SELECT max(id) FROM venue) AS latest', []),
+    ('SELECT venue.id FROM venue ORDER BY venue.id', []),
+    ('SELECT venue.id FROM venue ORDER BY venue.id LIMIT 10', []),
+    ('SELECT venue.id FROM venue ORDER BY venue.name, venue.id', []),
+    ('SELECT venue.id FROM venue ORDER BY venue.city', ['venue']),
+    ('SELECT venue.id FROM venue ORDER BY venue.id DESC, venue.city', []),
+    ('SELECT venue.id FROM venue WHERE venue.city = ? ORDER BY venue.city, venue.id', ['venue']),
+    ('SELECT venue.id FROM venue WHERE venue.city = ? ORDER BY venue.id', ['venue']),
+    ('SELECT count(*) FROM venue WHERE venue.city = ?', ['venue']),
+])
+def test_sqlite_seq_scans(cursor, statement, scans):
+    parameters = ('Austin',) if '?' in statement else ()
+
+    assert _sqlite_seq_scans(cursor, statement, parameters) == scans
+
+
+def test_db_advise_on_seeded_data(app):
+    generate(200)
+
+    result = app.test_cli_runner().invoke(args=['db-advise'])
+
+    assert result.exit_code == 0, result.output
+    assert 'No sequential scans found' in result.output
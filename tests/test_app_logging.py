@@ -0,0 +1,75 @@
+import json
+import os
+
+import pytest
+
+
+def log_in_worker(app, message):
+    """Fork like a preloading gunicorn master; the child logs ``message``. Returns its pid."""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            app.logger.error(message)
+            app.extensions['log_listener'].stop()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    return pid
+
+
+def drain(app):
+    app.extensions['log_listener'].queue.join()
+
+
+def messages(path):
+    with open(path) as f:
+        return [json.loads(line)['message'] for line in f]
+
+
+@pytest.mark.parametrize('rotation', ['size', 'time'])
+def test_workers_rotate_files_of_their_own(make_app, tmp_path, rotation):
+    log_file = tmp_path / 'error.log'
+    app = make_app(DEBUG=False, LOG_FILE=str(log_file), LOG_ROTATION=rotation)
+
+    pid = log_in_worker(app, 'from the worker')
+    app.logger.error('from the master')
+    drain(app)
+
+    assert messages(log_file)[-1] == 'from the master'
+    assert messages(tmp_path / f'error.{pid}.log') == ['from the worker']
+
+
+def test_external_rotation_shares_one_file(make_app, tmp_path):
+    log_file = tmp_path / 'error.log'
+    app = make_app(DEBUG=False, LOG_FILE=str(log_file), LOG_ROTATION='external')
+
+    log_in_worker(app, 'from the worker')
+    os.rename(log_file, tmp_path / 'error.log.1')
+    log_in_worker(app, 'after rotation')
+    app.logger.error('from the master')
+    drain(app)
+
+    assert 'from the worker' in messages(tmp_path / 'error.log.1')
+    assert messages(log_file)[-2:] == ['after rotation', 'from the master']
+    assert sorted(os.listdir(tmp_path)) == ['error.log', 'error.log.1', 'fyyur.db']
+
+
+def test_every_live_app_gets_a_listener_after_fork(make_app, tmp_path):
+    apps = [
+        make_app(DEBUG=False, LOG_FILE=str(tmp_path / f'{name}.log'), LOG_ROTATION='size')
+        for name in ('first', 'second')
+    ]
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            # Both apps are named 'app', so they share app.logger.
+            apps[0].logger.error('from the worker')
+            for app in apps:
+                app.extensions['log_listener'].stop()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    assert messages(tmp_path / f'first.{pid}.log') == ['from the worker']
+    assert messages(tmp_path / f'second.{pid}.log') == ['from the worker']
@@ -0,0 +1,41 @@
+from sqlalchemy import insert
+
+from conftest import add_venue, count_queries
+from models import db, Venue
+
+
+def add_venue_elsewhere(city, state):
+    """Insert a venue without this process's session hooks, as another worker would."""
+    db.session.execute(insert(Venue).values(
+        name='The Far Room', city=city, state=state, address='1 Main St',
+        phone='512-555-0100', genres=['Jazz'],
+    ))
+    db.session.commit()
+
+
+def test_area_page(client):
+    add_venue()
+
+    assert client.get('/venues/area/TX/Austin').status_code == 200
+    assert client.get('/venues/area/TX/Houston').status_code == 404
+
+
+def test_area_added_by_another_worker(client):
+    add_venue()
+    assert client.get('/venues').status_code == 200
+
+    add_venue_elsewhere('Houston', 'TX')
+
+    response = client.get('/venues/area/TX/Houston')
+    assert response.status_code == 200
+    assert 'The Far Room' in response.get_data(as_text=True)
+
+
+def test_directory_is_reused(client):
+    add_venue()
+    client.get('/venues/area/TX/Austin')
+
+    with count_queries(db.engine) as statements:
+        client.get('/venues/area/TX/Austin')
+
+    assert not any('GROUP BY venue.state, venue.city' in statement for statement in statements)
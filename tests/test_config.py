@@ -0,0 +1,31 @@
+import pytest
+
+from config import parse_timeouts
+from pooling import statement_timeout
+
+
+def test_parse_timeouts():
+    assert parse_timeouts('') == {}
+    assert parse_timeouts('main.search_venues=2000, api.shows=0,') == {
+        'main.search_venues': 2000,
+        'api.shows': 0,
+    }
+
+
+@pytest.mark.parametrize('value', ['main.shows', 'main.shows=soon', '=100', 'main.shows=-1'])
+def test_parse_timeouts_rejects(value):
+    with pytest.raises(ValueError):
+        parse_timeouts(value)
+
+
+def test_statement_timeout_per_endpoint(make_app):
+    app = make_app(DB_STATEMENT_TIMEOUT_MS=5000, DB_STATEMENT_TIMEOUTS={
+        **parse_timeouts('main.search_venues=2000'), 'api.shows': 0,
+    })
+
+    with app.test_request_context('/venues/search', method='POST'):
+        assert statement_timeout() == 2000
+    with app.test_request_context('/api/shows'):
+        assert statement_timeout() == 0
+    with app.test_request_context('/venues'):
+        assert statement_timeout() == 5000
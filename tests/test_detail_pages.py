@@ -0,0 +1,71 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+
+from benchmarks.generator import generate
+from conftest import add_artist, add_venue, count_queries
+from models import db, Show
+
+# The conditional GET validator's updated_at lookup, then the page's one query.
+DETAIL_PAGE_QUERIES = 2
+
+
+@pytest.fixture
+def catalogue(app):
+    generate(200, venues=10, artists=20)
+    db.session.remove()
+
+
+def busiest(key):
+    """Id with the most shows for ``key`` (a Show foreign key), and its show count."""
+    column = getattr(Show, key)
+    return db.session.execute(
+        select(column, func.count()).group_by(column).order_by(func.count().desc(), column).limit(1)
+    ).one()
+
+
+@pytest.mark.parametrize('key, url', [
+    ('venue_id', '/venues/{}'),
+    ('artist_id', '/artists/{}'),
+])
+def test_detail_page_query_count(catalogue, client, key, url):
+    id, show_count = busiest(key)
+    assert show_count > 1
+
+    with count_queries(db.engine) as statements:
+        response = client.get(url.format(id))
+
+    assert response.status_code == 200
+    assert len(statements) == DETAIL_PAGE_QUERIES, statements
+
+
+@pytest.mark.parametrize('add, url', [
+    (add_venue, '/venues/{}'),
+    (add_artist, '/artists/{}'),
+])
+def test_detail_page_without_shows(catalogue, client, add, url):
+    id = add(name='Empty').id
+
+    with count_queries(db.engine) as statements:
+        response = client.get(url.format(id))
+
+    assert response.status_code == 200
+    assert len(statements) == DETAIL_PAGE_QUERIES, statements
+
+
+def test_detail_page_splits_past_and_upcoming(catalogue, client):
+    venue_id, _ = busiest('venue_id')
+    now = datetime.now()
+    starts = db.session.scalars(select(Show.start_time).where(Show.venue_id == venue_id)).all()
+    past = sum(1 for start in starts if start < now)
+
+    body = client.get(f'/venues/{venue_id}').get_data(as_text=True)
+
+    assert f'{past} Past Show' in body
+    assert f'{len(starts) - past} Upcoming Show' in body
+
+
+@pytest.mark.parametrize('url', ['/venues/0', '/artists/0'])
+def test_missing_detail_page(app, client, url):
+    assert client.get(url).status_code == 404
@@ -0,0 +1,56 @@
+import csv
+import gzip
+from datetime import timedelta
+
+from conftest import add_venue
+from exporter import load_state
+from models import db, utcnow
+
+
+def export(app, out_dir):
+    result = app.test_cli_runner().invoke(args=['export', '--table', 'venue', '--incremental', '--out', str(out_dir)])
+    assert result.exit_code == 0, result.output
+    path = result.output.split(' -> ')[1].split(' in ')[0]
+    with gzip.open(path, 'rt', newline='') as f:
+        return [row['name'] for row in csv.DictReader(f)]
+
+
+def ago(seconds):
+    return utcnow() - timedelta(seconds=seconds)
+
+
+def test_incremental_export_waits_for_late_commits(app, tmp_path):
+    app.config['EXPORT_OVERLAP_SECONDS'] = 60
+    add_venue(name='Settled', updated_at=ago(600))
+    add_venue(name='Recent', updated_at=ago(30))
+
+    assert export(app, tmp_path) == ['Settled']
+
+    # Stamped before the one above but committed after the export ran, as
+    # by a transaction that was still open at the time.
+    add_venue(name='Late', updated_at=ago(40))
+
+    app.config['EXPORT_OVERLAP_SECONDS'] = 0
+    assert export(app, tmp_path) == ['Late', 'Recent']
+    assert export(app, tmp_path) == []
+
+
+def test_incremental_export_includes_updates(app, tmp_path):
+    app.config['EXPORT_OVERLAP_SECONDS'] = 0
+    venue = add_venue(name='First', updated_at=ago(60))
+    assert export(app, tmp_path) == ['First']
+
+    venue.name = 'Renamed'
+    venue.updated_at = ago(30)
+    db.session.commit()
+
+    assert export(app, tmp_path) == ['Renamed']
+
+
+def test_state_file_keeps_only_the_mark(app, tmp_path):
+    app.config['EXPORT_OVERLAP_SECONDS'] = 0
+    for i in range(5):
+        add_venue(name=f'Venue {i}', updated_at=ago(60))
+    export(app, tmp_path)
+
+    assert set(load_state(str(tmp_path))['venue']) == {'updated_at', 'id', 'exported_at', 'path'}
@@ -0,0 +1,35 @@
+import json
+
+from models import db, Venue
+
+
+def venue_line(name):
+    return json.dumps({
+        'name': name, 'city': 'Austin', 'state': 'TX', 'address': '1 Main St',
+        'phone': '512-555-0100', 'genres': ['Jazz'], 'facebook_link': 'https://facebook.com/venue',
+    })
+
+
+def test_import_rejects_malformed_jsonl_lines(app, tmp_path):
+    path = tmp_path / 'venues.jsonl'
+    path.write_text('\n'.join([
+        venue_line('The Blue Room'),
+        '{"name": "The Broken Room",',
+        '[1, 2]',
+        venue_line('The Green Room'),
+    ]) + '\n')
+    rejects = tmp_path / 'rejects.jsonl'
+
+    result = app.test_cli_runner().invoke(
+        args=['import', 'venues', str(path), '--rejects', str(rejects)]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert 'read 4, inserted 2, rejected 2' in result.output
+    assert sorted(name for name, in db.session.query(Venue.name)) == ['The Blue Room', 'The Green Room']
+    with open(rejects) as f:
+        rejected = [json.loads(line) for line in f]
+    assert [entry['line'] for entry in rejected] == [2, 3]
+    assert rejected[0]['errors']['line'][0].startswith('not valid JSON')
+    assert rejected[0]['row'] == '{"name": "The Broken Room",'
+    assert rejected[1] == {'line': 3, 'errors': {'line': ['must be a JSON object']}, 'row': [1, 2]}
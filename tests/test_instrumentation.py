@@ -0,0 +1,77 @@
+import json
+import os
+import queue
+
+from flask import g
+from sqlalchemy import select
+
+from conftest import add_venue
+from instrumentation import _request_started
+from models import db, Venue
+
+
+def test_request_log_is_written_in_the_background(make_app, tmp_path):
+    path = tmp_path / 'requests.jsonl'
+    app = make_app(REQUEST_LOG_PATH=str(path))
+    client = app.test_client()
+
+    response = client.get('/venues/0')
+    app.extensions['request_log'].listener.queue.join()
+
+    assert 'db;dur=' in response.headers['Server-Timing']
+    with open(path) as f:
+        record = json.loads(f.readline())
+    assert record['endpoint'] == 'main.show_venue'
+    assert record['route'] == '/venues/<int:venue_id>'
+    assert record['status'] == 404
+    assert record['queries'] >= 1
+    assert {'wall_ms', 'db_ms', 'pool_wait_ms', 'template_ms'} <= set(record)
+
+
+def test_request_log_drops_records_when_full(make_app, tmp_path):
+    app = make_app(REQUEST_LOG_PATH=str(tmp_path / 'requests.jsonl'))
+    log = app.extensions['request_log']
+    # A queue nothing drains, as when the writer thread falls behind.
+    log.handler.queue = queue.Queue(maxsize=1)
+
+    for _ in range(3):
+        log.write({'path': '/'})
+
+    assert log.handler.dropped == 2
+
+
+def test_rows_fetched_are_counted(make_app, tmp_path):
+    path = tmp_path / 'requests.jsonl'
+    app = make_app(REQUEST_LOG_PATH=str(path))
+    with app.app_context():
+        for name in ('One', 'Two', 'Three'):
+            add_venue(name=name)
+
+    with app.test_request_context():
+        _request_started(app)
+        db.session.execute(select(Venue.id)).all()
+        db.session.execute(select(Venue.id).limit(1)).first()
+        assert g.request_metrics['rows'] == 4
+
+    app.test_client().get('/venues')
+    app.extensions['request_log'].listener.queue.join()
+    with open(path) as f:
+        record = json.loads(f.readline())
+    assert record['rows'] >= 3
+
+
+def test_forked_worker_writes_the_request_log(make_app, tmp_path):
+    path = tmp_path / 'requests.jsonl'
+    app = make_app(REQUEST_LOG_PATH=str(path))
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            app.test_client().get('/venues/0')
+            app.extensions['request_log'].listener.stop()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+
+    with open(path) as f:
+        assert json.loads(f.readline())['endpoint'] == 'main.show_venue'
@@ -0,0 +1,19 @@
+import os
+
+from pooling import PoolStats
+
+
+def test_pool_stats_endpoint_reports_this_worker(client, app):
+    app.extensions['pool_stats'] = stats = PoolStats()
+    stats.record(0.002)
+    stats.record(0.004)
+
+    response = client.get('/api/pool-stats')
+
+    assert response.get_json() == {
+        'pid': os.getpid(),
+        'checkouts': 2,
+        'wait_total_ms': 6.0,
+        'wait_avg_ms': 3.0,
+        'wait_max_ms': 4.0,
+    }
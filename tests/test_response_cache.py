@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from cache import response_cache
+from conftest import add_artist, add_venue, count_queries
+from models import db
+
+# A cache hit still answers the conditional GET validator's lookup.
+HIT_QUERIES = 1
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(RESPONSE_CACHE_ENABLED=True)
+    with app.app_context():
+        yield app
+    response_cache.clear()
+
+
+@pytest.fixture
+def reader(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def editor(app):
+    return app.test_client()
+
+
+def venue_form(**fields):
+    form = {'name': 'The Blue Room', 'city': 'Austin', 'state': 'TX', 'address': '1 Main St',
+            'phone': '512-555-0100', 'genres': ['Jazz'], 'facebook_link': 'https://facebook.com/blue'}
+    form.update(fields)
+    return form
+
+
+def is_cached(client, url):
+    with count_queries(db.engine) as statements:
+        client.get(url)
+    return len(statements) == HIT_QUERIES
+
+
+def test_detail_page_is_cached(reader):
+    venue_id = add_venue().id
+
+    first = reader.get(f'/venues/{venue_id}')
+
+    assert is_cached(reader, f'/venues/{venue_id}')
+    assert reader.get(f'/venues/{venue_id}').get_data() == first.get_data()
+
+
+def test_edit_invalidates_venue_page_and_directory(reader, editor):
+    venue_id = add_venue().id
+    assert 'The Blue Room' in reader.get(f'/venues/{venue_id}').get_data(as_text=True)
+    assert 'The Blue Room' in reader.get('/venues').get_data(as_text=True)
+
+    editor.post(f'/venues/{venue_id}/edit', data=venue_form(name='The Green Room'))
+
+    assert 'The Green Room' in reader.get(f'/venues/{venue_id}').get_data(as_text=True)
+    assert 'The Green Room' in reader.get('/venues').get_data(as_text=True)
+
+
+def test_new_show_invalidates_its_venue_and_artist(reader, editor):
+    venue_id = add_venue().id
+    artist_id = add_artist().id
+    reader.get(f'/venues/{venue_id}')
+    reader.get(f'/artists/{artist_id}')
+
+    editor.post('/shows/create', data={
+        'venue_id': venue_id,
+        'artist_id': artist_id,
+        'start_time': (datetime.now() + timedelta(days=7)).strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+    assert 'Velvet Owls' in reader.get(f'/venues/{venue_id}').get_data(as_text=True)
+    assert 'The Blue Room' in reader.get(f'/artists/{artist_id}').get_data(as_text=True)
+
+
+def test_edit_keeps_unrelated_entries(reader, editor):
+    edited = add_venue().id
+    other = add_venue(name='The Velvet Cellar').id
+    reader.get(f'/venues/{edited}')
+    reader.get(f'/venues/{other}')
+
+    editor.post(f'/venues/{edited}/edit', data=venue_form(name='The Green Room'))
+
+    assert not is_cached(reader, f'/venues/{edited}')
+    assert is_cached(reader, f'/venues/{other}')
+
+
+def test_rollback_keeps_entries(reader):
+    venue = add_venue()
+    reader.get(f'/venues/{venue.id}')
+
+    venue.name = 'The Green Room'
+    db.session.flush()
+    db.session.rollback()
+
+    assert is_cached(reader, f'/venues/{venue.id}')
+    assert 'The Blue Room' in reader.get(f'/venues/{venue.id}').get_data(as_text=True)
@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import insert
+
+from models import db, Venue
+from routing import replicas
+
+
+def seed(engine, name):
+    db.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(Venue).values(
+            id=1, name=name, city='Austin', state='TX', address='1 Main St',
+            phone='512-555-0100', genres=['Jazz'],
+        ))
+
+
+@pytest.fixture
+def routed_app(make_app, tmp_path):
+    """App on a primary database plus ``replica_names`` replicas, each seeded
+    with venue 1 named after the database it lives in."""
+    def make(*replica_names, **overrides):
+        binds = {f'replica_{i}': f"sqlite:///{tmp_path / f'replica_{i}.db'}" for i in range(len(replica_names))}
+        app = make_app(SQLALCHEMY_BINDS=binds, RESPONSE_CACHE_ENABLED=False, **overrides)
+        with app.app_context():
+            seed(db.engine, 'Primary Hall')
+            for i, name in enumerate(replica_names):
+                seed(db.engines[f'replica_{i}'], name)
+        return app
+    return make
+
+
+def venue_name(client):
+    body = client.get('/venues/1').get_data(as_text=True)
+    return next(name for name in ('Primary Hall', 'Replica Hall', 'Standby Hall') if name in body)
+
+
+def create_venue(client, name):
+    return client.post('/venues/create', data={
+        'name': name, 'city': 'Austin', 'state': 'TX', 'address': '2 Main St',
+        'phone': '512-555-0102', 'genres': ['Jazz'], 'facebook_link': 'https://facebook.com/new',
+    })
+
+
+def test_reads_go_to_replica(routed_app):
+    client = routed_app('Replica Hall').test_client()
+
+    assert venue_name(client) == 'Replica Hall'
+
+
+def test_writes_go_to_primary(routed_app):
+    app = routed_app('Replica Hall')
+
+    create_venue(app.test_client(), 'The New Room')
+
+    with app.app_context():
+        assert db.session.query(Venue).filter_by(name='The New Room').count() == 1
+        replica = db.engines['replica_0']
+        with replica.connect() as connection:
+            assert connection.execute(
+                Venue.__table__.select().where(Venue.name == 'The New Room')
+            ).first() is None
+
+
+def test_reads_stick_to_primary_after_a_write(routed_app):
+    app = routed_app('Replica Hall', REPLICA_STICKY_SECONDS=60)
+    writer, other = app.test_client(), app.test_client()
+
+    create_venue(writer, 'The New Room')
+
+    assert venue_name(writer) == 'Primary Hall'
+    assert venue_name(other) == 'Replica Hall'
+
+
+def test_sticky_reads_expire(routed_app):
+    app = routed_app('Replica Hall', REPLICA_STICKY_SECONDS=0)
+    writer = app.test_client()
+
+    create_venue(writer, 'The New Room')
+
+    assert venue_name(writer) == 'Replica Hall'
+
+
+def test_replicas_take_turns(routed_app):
+    client = routed_app('Replica Hall', 'Standby Hall').test_client()
+
+    names = [venue_name(client) for _ in range(4)]
+
+    assert names == ['Replica Hall', 'Standby Hall'] * 2
+
+
+def test_unhealthy_replica_falls_back_to_primary(make_app, tmp_path):
+    # The replica's directory doesn't exist, so it can't be opened.
+    app = make_app(
+        SQLALCHEMY_BINDS={'replica_0': f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"},
+        RESPONSE_CACHE_ENABLED=False,
+    )
+    with app.app_context():
+        seed(db.engine, 'Primary Hall')
+
+    assert venue_name(app.test_client()) == 'Primary Hall'
+    assert replicas._health['replica_0'][0] is False
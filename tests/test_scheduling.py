@@ -0,0 +1,192 @@
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from conftest import add_artist, add_venue
+from models import db, Show, MAX_SHOW_MINUTES
+from scheduling import IntervalTree, double_booked, find_conflicts
+
+START = datetime(2030, 6, 1, 20, 0)
+
+
+def at(minutes):
+    return START + timedelta(minutes=minutes)
+
+
+def proposal(venue_id, artist_id, minutes=0, duration=None):
+    values = {'venue_id': venue_id, 'artist_id': artist_id, 'start_time': at(minutes)}
+    if duration is not None:
+        values['duration_minutes'] = duration
+    return values
+
+
+def sorted_conflicts(conflicts):
+    return {
+        position: sorted(found, key=lambda conflict: sorted(conflict.items()))
+        for position, found in conflicts.items()
+    }
+
+
+@pytest.fixture
+def booked(app):
+    """Two venues and artists; venue 1 and artist 1 have a show from 20:00 to 22:00."""
+    venues = [add_venue(name=f'Venue {i}').id for i in (1, 2)]
+    artists = [add_artist(name=f'Artist {i}').id for i in (1, 2)]
+    show = Show(venue_id=venues[0], artist_id=artists[0], start_time=START, duration_minutes=120)
+    db.session.add(show)
+    db.session.commit()
+    return venues, artists, show.id
+
+
+def test_interval_tree_matches_brute_force():
+    rng = random.Random(0)
+    intervals = []
+    for item in range(300):
+        start = rng.randint(0, 1000)
+        intervals.append((start, start + rng.randint(1, 60), item))
+    tree = IntervalTree(intervals)
+
+    for _ in range(500):
+        start = rng.randint(-50, 1050)
+        end = start + rng.randint(1, 80)
+        expected = {item for s, e, item in intervals if s < end and e > start}
+        assert set(tree.overlapping(start, end)) == expected
+
+
+def test_interval_tree_is_half_open():
+    tree = IntervalTree([(10, 20, 'a')])
+
+    assert tree.overlapping(20, 30) == []
+    assert tree.overlapping(0, 10) == []
+    assert tree.overlapping(19, 30) == ['a']
+    assert IntervalTree([]).overlapping(0, 10) == []
+
+
+@pytest.mark.parametrize('minutes, duration, resources', [
+    (60, None, ['venue_id']),      # starts during the show
+    (-60, 90, ['venue_id']),       # ends during it
+    (-30, 240, ['venue_id']),      # covers it
+    (120, None, []),               # starts as it ends
+    (-60, 60, []),                 # ends as it starts
+])
+def test_find_conflicts_with_existing_show(booked, minutes, duration, resources):
+    venues, artists, show_id = booked
+
+    conflicts = find_conflicts([proposal(venues[0], artists[1], minutes, duration)])
+
+    assert [conflict['resource'] for conflict in conflicts.get(0, [])] == resources
+    assert all(conflict['show_id'] == show_id for conflict in conflicts.get(0, []))
+
+
+def test_find_conflicts_names_venue_and_artist(booked):
+    venues, artists, show_id = booked
+
+    assert sorted_conflicts(find_conflicts([proposal(venues[0], artists[0], 30)])) == {
+        0: [{'resource': 'artist_id', 'show_id': show_id}, {'resource': 'venue_id', 'show_id': show_id}],
+    }
+    assert find_conflicts([proposal(venues[1], artists[0], 30)]) == {
+        0: [{'resource': 'artist_id', 'show_id': show_id}],
+    }
+    assert find_conflicts([proposal(venues[1], artists[1], 30)]) == {}
+
+
+def test_find_conflicts_sees_longest_earlier_show(booked):
+    venues, artists, _ = booked
+    long_show = Show(venue_id=venues[1], artist_id=artists[1], start_time=at(-MAX_SHOW_MINUTES),
+                     duration_minutes=MAX_SHOW_MINUTES + 1)
+    db.session.add(long_show)
+    db.session.commit()
+
+    assert find_conflicts([proposal(venues[1], artists[0], 300)]) == {}
+    assert find_conflicts([proposal(venues[1], artists[0], -10, 5)]) == {
+        0: [{'resource': 'venue_id', 'show_id': long_show.id}],
+    }
+
+
+def test_find_conflicts_between_proposals(booked):
+    venues, artists, _ = booked
+
+    conflicts = find_conflicts([
+        proposal(venues[1], artists[1], 300),
+        proposal(venues[1], artists[1], 360),
+        proposal(venues[1], artists[1], 420),
+    ])
+
+    assert sorted_conflicts(conflicts) == {
+        0: [{'proposal': 1, 'resource': 'artist_id'}, {'proposal': 1, 'resource': 'venue_id'}],
+        1: [{'proposal': 0, 'resource': 'artist_id'}, {'proposal': 0, 'resource': 'venue_id'},
+            {'proposal': 2, 'resource': 'artist_id'}, {'proposal': 2, 'resource': 'venue_id'}],
+        2: [{'proposal': 1, 'resource': 'artist_id'}, {'proposal': 1, 'resource': 'venue_id'}],
+    }
+
+
+def test_double_booked_keeps_first_of_each_clash(booked):
+    venues, artists, _ = booked
+
+    rejected = double_booked([
+        proposal(venues[0], artists[1], 0),     # existing show
+        proposal(venues[1], artists[1], 300),
+        proposal(venues[1], artists[1], 360),   # clashes with the one before
+        proposal(venues[1], artists[1], 420),   # only clashes with a rejected one
+    ])
+
+    assert rejected == {0, 2}
+
+
+def test_check_schedule_endpoint(booked, client):
+    venues, artists, show_id = booked
+
+    response = client.post('/api/shows/check', json={'shows': [
+        {'venue_id': venues[0], 'artist_id': artists[1], 'start_time': at(60).isoformat()},
+        {'venue_id': venues[1], 'artist_id': artists[1], 'start_time': at(300).isoformat(), 'duration_minutes': 60},
+        {'venue_id': 'one', 'artist_id': artists[1], 'start_time': 'tonight'},
+        {'venue_id': venues[1], 'artist_id': artists[1], 'start_time': at(330).isoformat()},
+    ]})
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert (body['count'], body['conflicting'], body['invalid']) == (4, 3, 1)
+    assert body['shows'][0] == {'ok': False, 'conflicts': [{'resource': 'venue_id', 'show_id': show_id}]}
+    assert {'resource': 'venue_id', 'proposal': 3} in body['shows'][1]['conflicts']
+    assert set(body['shows'][2]['errors']) == {'venue_id', 'start_time'}
+    assert {'resource': 'venue_id', 'proposal': 1} in body['shows'][3]['conflicts']
+
+
+def test_check_schedule_limits(app, client):
+    app.config['SCHEDULE_CHECK_MAX_SHOWS'] = 2
+    show = {'venue_id': 1, 'artist_id': 1, 'start_time': START.isoformat()}
+
+    assert client.post('/api/shows/check', json={'shows': [show] * 3}).status_code == 400
+    assert client.post('/api/shows/check', json=[show]).status_code == 400
+
+
+def test_show_form_rejects_double_booking(booked, client):
+    venues, artists, _ = booked
+
+    response = client.post('/shows/create', data={
+        'venue_id': venues[0], 'artist_id': artists[1],
+        'start_time': at(60).strftime('%Y-%m-%d %H:%M:%S'),
+    })
+
+    assert 'the venue is already booked at that time' in response.get_data(as_text=True)
+    assert db.session.query(Show).count() == 1
+
+
+def test_import_rejects_double_bookings(booked, app, tmp_path):
+    venues, artists, _ = booked
+    path = tmp_path / 'shows.jsonl'
+    rows = [
+        proposal(venues[0], artists[1], 60),            # existing show
+        proposal(venues[1], artists[1], 300, 60),
+        proposal(venues[1], artists[1], 330, 60),       # earlier row
+        proposal(venues[1], artists[1], 360),           # back to back
+    ]
+    path.write_text(''.join(json.dumps(row, default=str) + '\n' for row in rows))
+
+    result = app.test_cli_runner().invoke(args=['import', 'shows', str(path), '--batch-size', '2'])
+
+    assert result.exit_code == 0, result.output
+    assert 'inserted 2, rejected 2' in result.output
+    assert db.session.query(Show).count() == 3
@@ -0,0 +1,53 @@
+import pytest
+
+from sqlalchemy import inspect
+
+from conftest import add_artist, add_venue
+from models import db
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app(RESPONSE_CACHE_ENABLED=False, SEARCH_RESULT_LIMIT=2)
+    with app.app_context():
+        yield app
+
+
+def heading(response):
+    body = response.get_data(as_text=True)
+    return body[body.index('<h3>') + 4:body.index('</h3>')]
+
+
+def test_capped_venue_search(client):
+    for name in ('The Blue Room', 'The Green Room', 'The Red Room'):
+        add_venue(name=name)
+
+    response = client.post('/venues/search', data={'search_term': 'room'})
+
+    assert heading(response) == 'Number of search results for "room": 2+'
+    assert 'Showing the first 2 matches' in response.get_data(as_text=True)
+
+
+def test_uncapped_venue_search(client):
+    for name in ('The Blue Room', 'The Green Room', 'Velvet Cellar'):
+        add_venue(name=name)
+
+    response = client.post('/venues/search', data={'search_term': 'room'})
+
+    assert heading(response) == 'Number of search results for "room": 2'
+    assert 'Showing the first' not in response.get_data(as_text=True)
+
+
+def test_capped_artist_search(client):
+    for name in ('Velvet Owls', 'Velvet Foxes', 'Velvet Tides'):
+        add_artist(name=name)
+
+    response = client.post('/artists/search', data={'search_term': 'velvet'})
+
+    assert heading(response) == 'Number of search results for "velvet": 2+'
+
+
+def test_postgres_search_indexes_are_not_created_on_sqlite(app):
+    names = {index['name'] for index in inspect(db.engine).get_indexes('venue')}
+    assert 'ix_venue_name_id' in names
+    assert not names & {'ix_venue_name_trgm', 'ix_venue_city_trgm', 'ix_venue_genres_gin'}